@@ -1,27 +1,47 @@
 import argparse
 import datetime
-from fetch import load_matchups
-from excel_export import write_spreadsheets
-from snapshot import snapshot_images
-from publisher import upload_to_github
-from indexer import build_index, commit_index
+import logging
+from cache import OfflineMiss
+from metrics import run
+from pipeline import STAGES, Context, check_stages, parse_stages, run_stages
+from writers import DEFAULT_FORMATS, WRITERS, parse_formats
+
+DEFAULT_STAGES = ("fetch", "export", "snapshot", "web", "index", "publish")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate and publish MLB matchups")
     parser.add_argument('-d','--date', type=lambda s: datetime.datetime.strptime(s,'%Y-%m-%d').date(),
                         help='Date in YYYY-MM-DD')
-    parser.add_argument('--no-upload', action='store_true')
+    parser.add_argument('--stages', type=parse_stages, default=list(DEFAULT_STAGES),
+                        help=f"Comma-separated stages to run, from {','.join(STAGES)} "
+                             f"(default {','.join(DEFAULT_STAGES)})")
+    parser.add_argument('--formats', type=parse_formats, default=list(DEFAULT_FORMATS),
+                        help=f"Comma-separated export formats, from {','.join(WRITERS)} "
+                             f"(default {','.join(DEFAULT_FORMATS)})")
+    parser.add_argument('--no-upload', action='store_true', help='Skip the index and publish stages')
+    parser.add_argument('--archive', metavar='PATH', help='Archive file for the archive stage')
+    parser.add_argument('--offline', action='store_true', help='Serve every request from the response cache; no network')
+    parser.add_argument('--cache-path', help='Response cache file (default ~/.cache/mlb-tools/http.sqlite)')
+    parser.add_argument('--report', default='matchups_run.json', help='JSON run report')
+    parser.add_argument('--prom-file', help='Also write run metrics as a Prometheus textfile (*.prom)')
     args = parser.parse_args()
+    stages = [s for s in args.stages if not (args.no_upload and s in ("index", "publish"))]
+    try:
+        check_stages(stages)
+    except ValueError as e:
+        parser.error(str(e))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s:%(name)s: %(message)s")
 
-    target = args.date or datetime.date.today()
-    df, best_df, display_date, date_str = load_matchups(target)
-    output = write_spreadsheets(df, best_df, display_date, date_str)
-    snapshot_images(output, df, best_df)
-    if not args.no_upload:
-        upload_to_github(output)
-        html = build_index()
-        commit_index(html)
+    if "fetch" in stages:
+        from client import configure_cache
+        configure_cache(args.cache_path, offline=args.offline)
+    ctx = Context(args.date or datetime.date.today(), archive=args.archive, formats=args.formats)
+    try:
+        with run("batter_matchups", args.report, args.prom_file):
+            run_stages(ctx, stages)
+    except OfflineMiss as e:
+        parser.error(f"--offline: nothing cached for {ctx.date_str} at {e.url}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,332 @@
+"""
+Historical archive of daily matchups.
+
+Every dated pitcher_matchups_YYYY-MM-DD.xlsx (or the DataFrames straight
+from the pipeline) is loaded into a SQLite store indexed by date, team,
+opponent and player, so questions across the season are one query:
+
+    python batter-matchups/archive.py ingest .
+    python batter-matchups/archive.py matchups --team NYY --start 2025-08-01 --end 2025-08-31 --min-lhb 8
+    python batter-matchups/archive.py rate --team NYY --col LHB --min 8 --start 2025-08-01 --end 2025-08-31
+    python batter-matchups/archive.py hitters --name "Aaron Judge"
+"""
+import argparse
+import datetime
+import glob
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from styles import BATTER_COLS
+
+log = logging.getLogger("matchups.archive")
+
+DEFAULT_PATH = "matchups_archive.sqlite"
+WORKBOOK_RE = re.compile(r"pitcher_matchups_(\d{4}-\d{2}-\d{2})\.xlsx$")
+HITTER_RE = re.compile(r"^(.*?)(?: \(([^()]*)\))?$")
+SIDES = dict(zip(BATTER_COLS, ("L", "R", "S")))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matchups (
+    date TEXT NOT NULL,
+    team TEXT NOT NULL,
+    opp TEXT,
+    start_time TEXT,
+    game_pk INTEGER,
+    lhb REAL,
+    rhb REAL,
+    PRIMARY KEY (date, team)
+);
+CREATE INDEX IF NOT EXISTS matchups_team ON matchups(team, date);
+CREATE INDEX IF NOT EXISTS matchups_opp ON matchups(opp, date);
+CREATE TABLE IF NOT EXISTS hitters (
+    date TEXT NOT NULL,
+    team TEXT NOT NULL,
+    side TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position TEXT,
+    player_id INTEGER,
+    PRIMARY KEY (date, team, side, name, player_id)
+);
+CREATE INDEX IF NOT EXISTS hitters_player ON hitters(player_id, date);
+CREATE INDEX IF NOT EXISTS hitters_name ON hitters(name, date);
+CREATE INDEX IF NOT EXISTS hitters_team ON hitters(team, date);
+CREATE TABLE IF NOT EXISTS batting (
+    date TEXT NOT NULL,
+    game_pk INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    name TEXT,
+    bat_side TEXT,
+    pa INTEGER NOT NULL,
+    ab INTEGER NOT NULL,
+    h INTEGER NOT NULL,
+    bb INTEGER NOT NULL,
+    hbp INTEGER NOT NULL,
+    sf INTEGER NOT NULL,
+    tb INTEGER NOT NULL,
+    hr INTEGER NOT NULL,
+    PRIMARY KEY (date, game_pk, player_id)
+);
+CREATE TABLE IF NOT EXISTS teams (
+    code TEXT PRIMARY KEY,
+    team_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results_ingested (
+    date TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingested (
+    date TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    digest TEXT,
+    ingested_at REAL NOT NULL
+);
+"""
+# Archives from before hitters were keyed by player id: rebuild that table under the new key
+_REKEY_HITTERS = """
+BEGIN;
+ALTER TABLE hitters RENAME TO hitters_old;
+DROP INDEX IF EXISTS hitters_player;
+DROP INDEX IF EXISTS hitters_name;
+DROP INDEX IF EXISTS hitters_team;
+""" + _SCHEMA + """
+INSERT INTO hitters SELECT * FROM hitters_old;
+DROP TABLE hitters_old;
+COMMIT;
+"""
+
+
+def _none(v):
+    return None if pd.isna(v) else v
+
+
+def _hitter_rows(day, best_df, picks=None):
+    """One row per listed hitter: from build_matchups()' picks when given, else parsed from the cells."""
+    if picks is not None:
+        return [(day, team, SIDES[col], name, pos or None, int(pid))
+                for team, col, pid, name, pos in picks[["TEAM", "column", "player_id", "name", "position"]]
+                .itertuples(index=False)]
+    rows = []
+    for rec in best_df.to_dict("records"):
+        for col, side in SIDES.items():
+            txt = rec.get(col)
+            if not isinstance(txt, str):
+                continue
+            for line in filter(None, txt.split("\n")):
+                name, pos = HITTER_RE.match(line.strip()).groups()
+                rows.append((day, rec["TEAM"], side, name, pos, None))
+    return rows
+
+
+def _workbook_matchups(path):
+    """
+    Matchups sheet back to one row per team. Games are stored as merged
+    'AWAY\\n@ HOME' cells over the away and home rows, with the start time
+    merged alongside. Rows without a team (e.g. ESPN's 'last updated'
+    footer) are dropped.
+    """
+    sheet = pd.read_excel(path, sheet_name="Matchups", header=1)
+    out, pending = [], None
+    for rec in sheet.to_dict("records"):
+        team, start = rec.get("TEAM"), _none(rec.get("StartTime"))
+        if isinstance(team, str) and "\n@ " in team:
+            away, home = team.split("\n@ ")
+            out.append((away, f"@{home}", start, rec["LHB"], rec["RHB"]))
+            pending = (home, away, start)
+        elif pending and _none(team) is None:
+            home, away, start = pending
+            out.append((home, away, start, rec["LHB"], rec["RHB"]))
+            pending = None
+        elif _none(team) is not None:
+            out.append((team, _none(rec.get("OPP")), start, rec["LHB"], rec["RHB"]))
+            pending = None
+    return out
+
+
+class Archive:
+    """SQLite-backed matchup history. Ingest is per date and idempotent."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        if not any(col == "player_id" and pk for _, col, _, _, _, pk in self.db.execute("PRAGMA table_info(hitters)")):
+            self.db.executescript(_REKEY_HITTERS)
+
+    def close(self):
+        self.db.close()
+
+    def has(self, day):
+        return self.db.execute("SELECT 1 FROM ingested WHERE date = ?", (str(day),)).fetchone() is not None
+
+    def _ingested(self, day):
+        """(source, digest) of a date's last ingest, or None."""
+        return self.db.execute("SELECT source, digest FROM ingested WHERE date = ?", (str(day),)).fetchone()
+
+    def _replace(self, day, matchups, hitters, source, digest=None):
+        with self.db:
+            for table in ("matchups", "hitters", "ingested"):
+                self.db.execute(f"DELETE FROM {table} WHERE date = ?", (day,))
+            self.db.executemany("INSERT OR REPLACE INTO matchups VALUES (?, ?, ?, ?, ?, ?, ?)", matchups)
+            self.db.executemany("INSERT OR REPLACE INTO hitters VALUES (?, ?, ?, ?, ?, ?)", hitters)
+            self.db.execute("INSERT INTO ingested VALUES (?, ?, ?, ?)", (day, source, digest, time.time()))
+
+    def ingest_frames(self, day, df, best_df, picks=None):
+        """Store one day from the pipeline's df/best_df; picks (from build_matchups) supplies the MLB ids."""
+        day = str(day)
+        matchups = [(day, r["TEAM"], _none(r["OPP"]), _none(r["StartTime"]) or None,
+                     _none(r["GamePk"]), _none(r["LHB"]), _none(r["RHB"]))
+                    for r in df.to_dict("records")]
+        self._replace(day, matchups, _hitter_rows(day, best_df, picks), "pipeline")
+        log.info(f"Archived {len(matchups)} matchups for {day}")
+
+    def ingest_workbook(self, path, force=False):
+        """
+        Store one dated workbook. Returns False when that date is already
+        archived from this exact file, or from the pipeline's frames (which
+        carry the player ids a workbook lacks); a regenerated workbook is
+        re-ingested.
+        """
+        m = WORKBOOK_RE.search(os.path.basename(path))
+        if not m:
+            raise ValueError(f"Not a dated matchups workbook: {path}")
+        day = m.group(1)
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        stored = self._ingested(day)
+        if not force and stored is not None and (stored[0] == "pipeline" or stored[1] == digest):
+            return False
+        matchups = [(day, team, opp, start, None, _none(lhb), _none(rhb))
+                    for team, opp, start, lhb, rhb in _workbook_matchups(path)]
+        best_df = pd.read_excel(path, sheet_name="BestMatchups", header=1)
+        self._replace(day, matchups, _hitter_rows(day, best_df), os.path.basename(path), digest)
+        return True
+
+    def ingest_paths(self, paths, force=False):
+        """Ingest workbooks (directories are scanned); dates already stored from the same file are skipped."""
+        files = []
+        for p in paths:
+            files += sorted(glob.glob(os.path.join(p, "pitcher_matchups_*.xlsx"))) if os.path.isdir(p) else [p]
+        added = sum(self.ingest_workbook(f, force) for f in files if WORKBOOK_RE.search(f))
+        log.info(f"Ingested {added} new or changed dates ({len(files)} workbooks scanned)")
+        return added
+
+    def result_dates(self):
+        """Dates whose actual batting lines (see backtest.py) are stored."""
+        return {d for (d,) in self.db.execute("SELECT date FROM results_ingested")}
+
+    def store_results(self, day, games, rows):
+        """Replace one date's batting lines: (game_pk, team_id, player_id, name, bat_side, pa, ab, h, bb, hbp, sf, tb, hr)."""
+        day = str(day)
+        with self.db:
+            self.db.execute("DELETE FROM batting WHERE date = ?", (day,))
+            self.db.execute("DELETE FROM results_ingested WHERE date = ?", (day,))
+            self.db.executemany("INSERT OR REPLACE INTO batting VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                [(day, *r) for r in rows])
+            self.db.execute("INSERT INTO results_ingested VALUES (?, ?, ?)", (day, games, time.time()))
+
+    def team_ids(self):
+        """Team code -> MLB id, as stored by store_teams()."""
+        return dict(self.db.execute("SELECT code, team_id FROM teams"))
+
+    def store_teams(self, team_map):
+        """Replace the code -> MLB id mapping that joins ratings to batting lines."""
+        with self.db:
+            self.db.execute("DELETE FROM teams")
+            self.db.executemany("INSERT INTO teams VALUES (?, ?)", team_map.items())
+
+    def _query(self, table, where, args):
+        sql = f"SELECT * FROM {table}" + (" WHERE " + " AND ".join(where) if where else "")
+        return pd.read_sql_query(sql + " ORDER BY date, team", self.db, params=args)
+
+    @staticmethod
+    def _range(where, args, start, end):
+        if start:
+            where.append("date >= ?"); args.append(str(start))
+        if end:
+            where.append("date <= ?"); args.append(str(end))
+
+    def matchups(self, start=None, end=None, team=None, opp=None, min_lhb=None, min_rhb=None):
+        where, args = [], []
+        self._range(where, args, start, end)
+        for col, val in (("team", team), ("opp", opp)):
+            if val:
+                where.append(f"{col} = ?"); args.append(val)
+        for col, val in (("lhb", min_lhb), ("rhb", min_rhb)):
+            if val is not None:
+                where.append(f"{col} >= ?"); args.append(val)
+        return self._query("matchups", where, args)
+
+    def hitters(self, start=None, end=None, team=None, player_id=None, name=None, side=None):
+        where, args = [], []
+        self._range(where, args, start, end)
+        for col, val in (("team", team), ("player_id", player_id), ("name", name), ("side", side)):
+            if val is not None:
+                where.append(f"{col} = ?"); args.append(val)
+        return self._query("hitters", where, args)
+
+    def rate(self, team, col="LHB", threshold=8, start=None, end=None):
+        """(team-days rated >= threshold, team-days with a rating), optionally for one team."""
+        col = {"LHB": "lhb", "RHB": "rhb"}[col.upper()]
+        where, args = [f"{col} IS NOT NULL"], []
+        if team:
+            where.append("team = ?"); args.append(team)
+        self._range(where, args, start, end)
+        hits, days = self.db.execute(
+            f"SELECT COALESCE(SUM({col} >= ?), 0), COUNT(*) FROM matchups WHERE " + " AND ".join(where),
+            [threshold] + args).fetchone()
+        return hits, days
+
+
+def main():
+    parse_date = lambda s: datetime.datetime.strptime(s, '%Y-%m-%d').date()
+    parser = argparse.ArgumentParser(description="Query the historical matchups archive")
+    parser.add_argument('--db', default=DEFAULT_PATH, help='Archive file')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    ing = sub.add_parser('ingest', help='Load dated workbooks (files or directories)')
+    ing.add_argument('paths', nargs='*', default=['.'])
+    ing.add_argument('--force', action='store_true', help='Re-ingest dates already archived')
+    for name in ('matchups', 'hitters', 'rate'):
+        q = sub.add_parser(name)
+        q.add_argument('--start', type=parse_date)
+        q.add_argument('--end', type=parse_date)
+        q.add_argument('--team')
+        if name == 'matchups':
+            q.add_argument('--opp')
+            q.add_argument('--min-lhb', type=float)
+            q.add_argument('--min-rhb', type=float)
+        elif name == 'hitters':
+            q.add_argument('--player-id', type=int)
+            q.add_argument('--name')
+            q.add_argument('--side', choices=['L', 'R', 'S'])
+        else:
+            q.add_argument('--col', choices=['LHB', 'RHB'], default='LHB')
+            q.add_argument('--min', type=float, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s: %(message)s")
+    archive = Archive(args.db)
+    if args.cmd == 'ingest':
+        archive.ingest_paths(args.paths, force=args.force)
+    elif args.cmd == 'matchups':
+        print(archive.matchups(args.start, args.end, args.team, args.opp,
+                               args.min_lhb, args.min_rhb).to_string(index=False))
+    elif args.cmd == 'hitters':
+        print(archive.hitters(args.start, args.end, args.team, args.player_id,
+                              args.name, args.side).to_string(index=False))
+    else:
+        hits, days = archive.rate(args.team, args.col, args.min, args.start, args.end)
+        pct = f" ({hits / days:.0%})" if days else ""
+        print(f"{args.team or 'All teams'} {args.col} >= {args.min:g}: {hits} of {days} days{pct}")
+    archive.close()
+
+
+if __name__ == '__main__':
+    main()
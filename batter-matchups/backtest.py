@@ -0,0 +1,187 @@
+"""
+Backtest the forecaster's LHB/RHB ratings against what hitters actually did.
+
+Ratings come from the archive (ingest the dated workbooks first). Each
+date's final box scores are fetched once and stored beside them in the
+archive's batting table, together with the team ids that join the two, so
+re-running with another --threshold is offline and takes seconds:
+
+    python batter-matchups/archive.py ingest .
+    python batter-matchups/backtest.py --start 2025-07-01 --end 2025-09-28
+    python batter-matchups/backtest.py --threshold 9 --no-fetch
+
+Every hitter who came to the plate is scored with the rating their team
+got for their side: LHB for lefties, RHB for righties, the better of the
+two for switch-hitters. Months are evaluated on a process pool into
+additive per-rating sums. Those sums are combined into the hit rate (games
+with a hit), AVG, OBP, SLG and OPS for each rating and for the picks rated
+at or above the threshold, with lift over all hitters.
+"""
+import argparse
+import datetime
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from archive import DEFAULT_PATH, Archive
+from client import configure_cache, gather, get_json
+from fetch import get_mlb_team_map, load_schedule
+
+log = logging.getLogger("matchups.backtest")
+
+THRESHOLD = 8
+BOXSCORE_URL = "https://statsapi.mlb.com/api/v1/game/{}/boxscore"
+PLAYERS_URL = "https://statsapi.mlb.com/api/v1/sports/1/players"
+BATTING = (("pa", "plateAppearances"), ("ab", "atBats"), ("h", "hits"), ("bb", "baseOnBalls"),
+           ("hbp", "hitByPitch"), ("sf", "sacFlies"), ("tb", "totalBases"), ("hr", "homeRuns"))
+SUMS = ["games", "hit_games"] + [col for col, _ in BATTING]
+
+
+def bat_sides(seasons):
+    """MLB id -> batSide code for every player of the given seasons."""
+    sides = {}
+    for season in seasons:
+        for p in get_json(PLAYERS_URL, params={"season": season}).get("people", []):
+            sides[p["id"]] = p.get("batSide", {}).get("code", "").upper()
+    return sides
+
+
+def parse_boxscore(box, game_pk, sides):
+    """Batting lines (game_pk, team_id, player_id, name, bat_side, pa, ab, h, bb, hbp, sf, tb, hr) of one game."""
+    rows = []
+    for side in ("away", "home"):
+        team = box.get("teams", {}).get(side, {})
+        for p in team.get("players", {}).values():
+            stats = p.get("stats", {}).get("batting", {})
+            if not stats.get("plateAppearances") or p.get("position", {}).get("type") == "Pitcher":
+                continue
+            pid = p["person"]["id"]
+            rows.append((game_pk, team["team"]["id"], pid, p["person"].get("fullName"), sides.get(pid, ""),
+                         *(int(stats.get(key, 0)) for _, key in BATTING)))
+    return rows
+
+
+def fetch_results(archive, start, end):
+    """
+    Store the batting lines of every finished date in start..end that has
+    ratings in the archive and no results yet, and the team ids joining
+    them to the ratings. Returns the dates added.
+    """
+    rated = set(archive.matchups(start, end)["date"])
+    wanted = sorted(d for d in rated - archive.result_dates() if d < datetime.date.today().isoformat())
+    if wanted or not archive.team_ids():
+        archive.store_teams(get_mlb_team_map())
+    if not wanted:
+        return []
+    first, last = (datetime.date.fromisoformat(d) for d in (wanted[0], wanted[-1]))
+    schedule = load_schedule(first, last)
+    games = [(day, g["gamePk"]) for day in wanted for g in schedule.get(day, [])
+             if g.get("status", {}).get("abstractGameState") == "Final"]
+    sides = bat_sides(range(first.year, last.year + 1))
+    boxes = gather(*(partial(get_json, BOXSCORE_URL.format(pk)) for _, pk in games))
+    by_day = {day: [] for day in wanted}
+    for (day, pk), box in zip(games, boxes):
+        by_day[day].append(parse_boxscore(box, pk, sides))
+    for day, lines in by_day.items():
+        archive.store_results(day, len(lines), [r for game in lines for r in game])
+    log.info(f"Stored results for {len(wanted)} dates ({len(games)} games)")
+    return wanted
+
+
+def month_sums(db_path, month, start=None, end=None):
+    """
+    Per-rating sums for one month (YYYY-MM) within start..end, read
+    straight from the archive file; ratings reach their batting lines
+    through the stored team ids.
+    """
+    where, args = "date LIKE ?", [f"{month}-%"]
+    if start:
+        where += " AND date >= ?"; args.append(str(start))
+    if end:
+        where += " AND date <= ?"; args.append(str(end))
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        ratings = pd.read_sql_query(f"SELECT date, team_id, lhb, rhb FROM matchups JOIN teams ON code = team "
+                                    f"WHERE {where}", db, params=args)
+        lines = pd.read_sql_query(f"SELECT * FROM batting WHERE {where}", db, params=args)
+    finally:
+        db.close()
+    j = lines.merge(ratings, on=["date", "team_id"])
+    side = j["bat_side"].to_numpy()
+    j["rating"] = np.select([side == "L", side == "R"], [j["lhb"], j["rhb"]], np.fmax(j["lhb"], j["rhb"]))
+    j = j.dropna(subset=["rating"]).assign(games=1, hit_games=lambda f: (f["h"] > 0).astype("int64"))
+    return j.groupby("rating")[SUMS].sum()
+
+
+def summarize(sums, threshold=THRESHOLD):
+    """Rates per rating plus the all / picked (>= threshold) / rest rows, with lift over all hitters."""
+    groups = {"all": sums.sum(), f">= {threshold:g}": sums[sums.index >= threshold].sum(),
+              f"< {threshold:g}": sums[sums.index < threshold].sum()}
+    t = pd.concat([sums.rename(index=lambda r: f"{r:g}"), pd.DataFrame(groups).T])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t["hit_rate"] = t["hit_games"] / t["games"]
+        t["avg"] = t["h"] / t["ab"]
+        t["obp"] = (t["h"] + t["bb"] + t["hbp"]) / (t["ab"] + t["bb"] + t["hbp"] + t["sf"])
+        t["slg"] = t["tb"] / t["ab"]
+        t["ops"] = t["obp"] + t["slg"]
+        t["lift"] = t["hit_rate"] / t.at["all", "hit_rate"]
+        t["ops_lift"] = t["ops"] / t.at["all", "ops"]
+    t.index.name = "rating"
+    return t[["games", "hit_games", "hr", "hit_rate", "avg", "obp", "slg", "ops", "lift", "ops_lift"]]
+
+
+def backtest(db_path=DEFAULT_PATH, start=None, end=None, threshold=THRESHOLD, workers=None, fetch=True):
+    """
+    Fetch missing results (unless fetch=False), then evaluate month by
+    month on a process pool. Evaluation only reads the archive.
+    """
+    archive = Archive(db_path)
+    try:
+        if fetch:
+            fetch_results(archive, start, end)
+        months = sorted({d[:7] for d in archive.result_dates()
+                         if (not start or d >= str(start)) and (not end or d <= str(end))})
+        has_teams = bool(archive.team_ids())
+    finally:
+        archive.close()
+    if not months or not has_teams:
+        raise LookupError("No dates with both ratings and results; ingest workbooks and fetch results first")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(partial(month_sums, db_path, start=start, end=end), months))
+    sums = pd.concat(parts).groupby(level=0).sum().sort_index()
+    return summarize(sums, threshold), months
+
+
+def main():
+    parse_date = lambda s: datetime.datetime.strptime(s, '%Y-%m-%d').date()
+    parser = argparse.ArgumentParser(description="Score archived ratings against actual batting results")
+    parser.add_argument('--db', default=DEFAULT_PATH, help='Archive file')
+    parser.add_argument('--start', type=parse_date)
+    parser.add_argument('--end', type=parse_date)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'Rating that makes a pick (default {THRESHOLD})')
+    parser.add_argument('--workers', type=int, help='Processes evaluating months')
+    parser.add_argument('--no-fetch', action='store_true', help='Only use results already in the archive')
+    parser.add_argument('--offline', action='store_true', help='Serve every request from the response cache; no network')
+    parser.add_argument('--cache-path', help='Response cache file (default ~/.cache/mlb-tools/http.sqlite)')
+    parser.add_argument('--csv', help='Also write the table to this CSV file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s: %(message)s")
+    configure_cache(args.cache_path, offline=args.offline)
+    try:
+        table, months = backtest(args.db, args.start, args.end, args.threshold, args.workers, not args.no_fetch)
+    except LookupError as e:
+        raise SystemExit(str(e))
+    print(f"Ratings vs results, {months[0]} to {months[-1]} ({len(months)} months)")
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+    if args.csv:
+        table.to_csv(args.csv)
+
+
+if __name__ == '__main__':
+    main()
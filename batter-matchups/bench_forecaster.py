@@ -0,0 +1,84 @@
+"""
+Benchmark the forecaster parsers against a saved copy of the ESPN article.
+
+    python batter-matchups/bench_forecaster.py -n 20
+    python batter-matchups/bench_forecaster.py --save forecaster.html
+
+The default page is the committed synthetic week in bench_fixtures/, built
+from the dated workbooks in the repo (one stacked <div> per day, as ESPN
+prints it) so the comparison runs offline:
+
+    python batter-matchups/bench_forecaster.py --synth 2025-09-23 2025-09-28
+"""
+import argparse
+import datetime
+import os
+import statistics
+import time
+
+from forecaster import URL, parse_forecaster, parse_forecaster_soup
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PAGE = os.path.join(HERE, "bench_fixtures", "forecaster.html")
+
+
+def synthesize(first, last, page=FIXTURE_PAGE):
+    """Write page as a forecaster article covering the workbooks dated first..last."""
+    from archive import _workbook_matchups
+    from bench_pipeline import WORKBOOK_DIR, _forecaster_html
+    slates = {}
+    for i in range((last - first).days + 1):
+        day = first + datetime.timedelta(days=i)
+        path = os.path.join(WORKBOOK_DIR, f"pitcher_matchups_{day}.xlsx")
+        if os.path.exists(path):
+            slates[day] = _workbook_matchups(path)
+    if not slates:
+        raise SystemExit(f"No workbooks between {first} and {last}")
+    with open(page, "w", encoding="utf-8") as f:
+        f.write(_forecaster_html(slates))
+    print(f"Synthesized {page}: {len(slates)} days")
+
+
+def _time(fn, html, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(html)
+        runs.append(time.perf_counter() - t0)
+    return result, runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ESPN forecaster parsing")
+    parser.add_argument('page', nargs='?', default=FIXTURE_PAGE,
+                        help='Saved forecaster article HTML (default: the synthetic fixture)')
+    parser.add_argument('-n', '--repeat', type=int, default=10)
+    parser.add_argument('--save', action='store_true', help='Download the live article to PAGE first')
+    parser.add_argument('--synth', nargs=2, metavar=('FIRST', 'LAST'), type=datetime.date.fromisoformat,
+                        help='Rebuild PAGE from the workbooks dated FIRST..LAST first')
+    args = parser.parse_args()
+
+    if args.synth:
+        synthesize(*args.synth, args.page)
+    elif args.save:
+        from client import get_text
+        with open(args.page, "w", encoding="utf-8") as f:
+            f.write(get_text(URL, headers={"User-Agent": "Mozilla/5.0"}))
+    with open(args.page, encoding="utf-8") as f:
+        html = f.read()
+
+    fast, fast_runs = _time(parse_forecaster, html, args.repeat)
+    soup, soup_runs = _time(parse_forecaster_soup, html, args.repeat)
+
+    if fast.keys() != soup.keys() or any(not fast[k].equals(soup[k]) for k in fast):
+        raise SystemExit("parse_forecaster and parse_forecaster_soup disagree")
+    rows = sum(len(df) for df in fast.values())
+    print(f"{len(html) / 1024:.0f} KB page, {len(fast)} days, {rows} team-day rows")
+    for name, runs in (("streaming", fast_runs), ("BeautifulSoup", soup_runs)):
+        print(f"{name:>14}: median {statistics.median(runs) * 1000:8.1f} ms"
+              f"  min {min(runs) * 1000:8.1f} ms")
+    print(f"{'speedup':>14}: {statistics.median(soup_runs) / statistics.median(fast_runs):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
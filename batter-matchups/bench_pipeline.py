@@ -0,0 +1,277 @@
+"""
+Benchmark every stage of the daily pipeline against recorded slates.
+
+A fixture is the response cache of one real run (ESPN article, team map,
+schedule and rosters for that date), so replaying it is fully offline:
+
+    python batter-matchups/bench_pipeline.py record 2025-07-04 2025-09-26
+    python batter-matchups/bench_pipeline.py run -n 5
+    python batter-matchups/bench_pipeline.py run --save-baseline
+
+Record slates while ESPN's forecaster still covers them, and keep a mix:
+full 15-game days, doubleheaders and light off-days. The committed
+fixtures are synthetic, rebuilt from the dated workbooks in the repo with
+made-up rosters, so they replay the same request pattern without any
+recorded data:
+
+    python batter-matchups/bench_pipeline.py synth 2025-09-26 2025-07-31 --doubleheader 2025-08-20
+
+Each stage is timed on its own, then the whole of fetch_all_teams() end to
+end; a separate traced pass reports net allocations and peak memory.
+Stages slower (median) or hungrier (peak) than the stored baseline by more
+than --tolerance are flagged and the run exits non-zero.
+"""
+import argparse
+import datetime
+import glob
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import espn_pitchermatchups_withtimes2 as script  # noqa: E402
+from archive import Archive, _workbook_matchups  # noqa: E402
+from cache import ResponseCache  # noqa: E402
+from client import configure_cache  # noqa: E402
+from excel_export import write_spreadsheets  # noqa: E402
+from fetch import (PEOPLE_BATCH, PEOPLE_URL, ROSTER_URL, annotate_positions, best_matchups,  # noqa: E402
+                   build_matchups, categorize, fetch_inputs, hitter_table, map_schedule)
+from forecaster import ARTICLE_ID, URL as FORECASTER_URL, espn_label, parse_forecaster  # noqa: E402
+from snapshot import snapshot_images  # noqa: E402
+
+FIXTURE_DIR = os.path.join(HERE, "bench_fixtures")
+BASELINE_PATH = os.path.join(HERE, "bench_baseline.json")
+TOLERANCE = 0.25
+WORKBOOK_DIR = os.path.dirname(HERE)
+ROSTER_SIZE, HITTERS = 26, 13
+
+
+def _fixture_day(path):
+    return datetime.date.fromisoformat(os.path.splitext(os.path.basename(path))[0])
+
+
+def record(days, fixture_dir=FIXTURE_DIR):
+    """Fetch each date's inputs live into <fixture_dir>/<date>.sqlite."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    for day in days:
+        path = os.path.join(fixture_dir, f"{day}.sqlite")
+        configure_cache(path)
+        team_map, html, schedule, rosters = fetch_inputs(day)
+        if espn_label(day) not in parse_forecaster(html):
+            raise SystemExit(f"ESPN forecaster does not cover {day}; cannot record it")
+        print(f"Recorded {path}: {len(schedule.get(str(day), []))} games")
+
+
+def _forecaster_html(slates):
+    """ESPN-style forecaster article for {day: workbook rows}: one row per team, one stacked <div> per day."""
+    cell = lambda v: "" if v is None or v != v else f"{v:g}"
+    teams = {}
+    for day, rows in slates.items():
+        for team, opp, _, lhb, rhb in rows:
+            teams.setdefault(team, []).append((espn_label(day), opp or "", cell(lhb), cell(rhb)))
+    divs = lambda values: "".join(f"<div>{v}</div>" for v in values)
+    body = "".join(f"<tr><td>{team}</td>" + "".join(f"<td>{divs(col)}</td>" for col in zip(*days)) + "</tr>"
+                   for team, days in teams.items())
+    return (f'<html><body><article data-id="{ARTICLE_ID}"><table class="inline-table"><thead><tr>'
+            f"<th>TEAM</th><th>DATE</th><th>OPP</th><th>LHB</th><th>RHB</th></tr></thead>"
+            f"<tbody>{body}</tbody></table></article></body></html>")
+
+
+def synthesize(day, doubleheader=False, fixture_dir=FIXTURE_DIR, workbook_dir=WORKBOOK_DIR):
+    """
+    Write <fixture_dir>/<date>.sqlite from that date's workbook: its teams,
+    games and ratings, with seeded made-up rosters. With doubleheader, the
+    first game is played twice, the second four hours later.
+    """
+    rows = _workbook_matchups(os.path.join(workbook_dir, f"pitcher_matchups_{day}.xlsx"))
+    team_ids = {team: 100 + i for i, team in enumerate(sorted({r[0] for r in rows}))}
+    games, hour = [], 16
+    for team, opp, _, _, _ in rows:
+        if not (opp or "").startswith("@"):
+            continue
+        for _ in range(2 if doubleheader and not games else 1):
+            games.append({"gamePk": 700000 + len(games), "gameDate": f"{day}T{hour % 24:02d}:05:00Z",
+                          "teams": {"away": {"team": {"id": team_ids[team]}},
+                                    "home": {"team": {"id": team_ids.get(opp[1:], 0)}}}})
+            hour += 4 if doubleheader and len(games) == 1 else 1
+    rng = random.Random(str(day))
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = os.path.join(fixture_dir, f"{day}.sqlite")
+    if os.path.exists(path):
+        os.remove(path)
+    cache = ResponseCache(path)
+    put = lambda url, params, obj: cache.store(requests.Request("GET", url, params=params).prepare().url,
+                                               (obj if isinstance(obj, str) else json.dumps(obj)).encode(), "utf-8")
+    people = []
+    for team, team_id in team_ids.items():
+        roster = []
+        for k in range(ROSTER_SIZE):
+            pitcher = k >= HITTERS
+            roster.append({"person": {"id": team_id * 100 + k, "fullName": f"{team} Player{k}"},
+                           "position": {"type": "Pitcher" if pitcher else "Hitter"}})
+            if not pitcher:
+                people.append({"id": team_id * 100 + k, "fullName": f"{team} Player{k}",
+                               "batSide": {"code": rng.choice("LLRRRS")},
+                               "primaryPosition": {"abbreviation": rng.choice(["C", "1B", "2B", "SS", "3B", "OF", "DH"])}})
+        put(ROSTER_URL.format(team_id), {"rosterType": "active", "season": day.year}, {"roster": roster})
+    for i in range(0, len(people), PEOPLE_BATCH):
+        batch = people[i:i + PEOPLE_BATCH]
+        put(PEOPLE_URL, {"personIds": ",".join(str(p["id"]) for p in batch)}, {"people": batch})
+    put(FORECASTER_URL, None, _forecaster_html({day: rows}))
+    put("https://statsapi.mlb.com/api/v1/teams", {"sportId": 1},
+        {"teams": [{"abbreviation": team, "id": team_id} for team, team_id in team_ids.items()]})
+    put("https://statsapi.mlb.com/api/v1/schedule", {"sportId": 1, "date": str(day)},
+        {"dates": [{"date": str(day), "games": games}]})
+    print(f"Synthesized {path}: {len(games)} games, {len(team_ids)} teams")
+
+
+def stages(day, workdir):
+    """
+    (name, callable) for each stage of one slate, run with workdir as the
+    current directory. Inputs are prepared untimed from the earlier stages,
+    so each callable times only its own work.
+    """
+    date_str, display_date = day.strftime("%Y-%m-%d"), day.strftime("%B %d, %Y")
+    team_map, html, schedule, rosters = fetch_inputs(day)
+    ratings = parse_forecaster(html)[espn_label(day)]
+    games = schedule.get(date_str, [])
+    mapped = map_schedule(ratings, games, team_map)
+    best = best_matchups(mapped)
+    picks = categorize(best, team_map, hitter_table(rosters))
+    df, best_df, hitters = build_matchups(ratings, games, team_map, rosters)
+    output = os.path.join(workdir, f"pitcher_matchups_{date_str}.xlsx")
+    db = os.path.join(workdir, "archive.sqlite")
+
+    def archive():
+        store = Archive(db)
+        store.ingest_frames(date_str, df, best_df, hitters)
+        store.close()
+
+    return [
+        ("fetch", lambda: fetch_inputs(day)),
+        ("parse", lambda: parse_forecaster(html)),
+        ("schedule", lambda: map_schedule(ratings, games, team_map)),
+        ("categorize", lambda: categorize(best, team_map, hitter_table(rosters))),
+        ("annotate", lambda: annotate_positions(best, picks)),
+        ("export", lambda: write_spreadsheets(df, best_df, display_date, date_str)),
+        ("snapshot", lambda: snapshot_images(output, df, best_df, display_date)),
+        ("archive", archive),
+        ("pipeline", lambda: script.fetch_all_teams(day, upload=False, archive=db)),
+    ], {"games": len(games), "teams": len(df), "best": len(best_df)}
+
+
+def measure(fn, repeat):
+    """Wall-clock runs, then one traced run: (runs, net allocated bytes, peak bytes)."""
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        allocated, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return runs, allocated, peak
+
+
+def run(fixtures, repeat, baseline, tolerance):
+    results, regressions = {}, []
+    for path in fixtures:
+        day = _fixture_day(path)
+        with tempfile.TemporaryDirectory() as workdir:
+            # Replay a copy: cache reads update access times in the fixture file
+            configure_cache(shutil.copy(path, workdir), offline=True)
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                calls, shape = stages(day, workdir)
+                print(f"\n{day}: {shape['games']} games, {shape['teams']} teams, "
+                      f"{shape['best']} best matchups")
+                print(f"{'stage':>10} {'median ms':>10} {'min ms':>9} {'alloc KiB':>10} {'peak KiB':>9}")
+                slate = results[str(day)] = {}
+                for name, fn in calls:
+                    runs, allocated, peak = measure(fn, repeat)
+                    slate[name] = {"median_ms": statistics.median(runs) * 1000, "min_ms": min(runs) * 1000,
+                                   "alloc_kib": allocated / 1024, "peak_kib": peak / 1024}
+                    flags = _compare(slate[name], baseline.get(str(day), {}).get(name), tolerance)
+                    regressions += [f"{day} {name}: {f}" for f in flags]
+                    m = slate[name]
+                    print(f"{name:>10} {m['median_ms']:10.1f} {m['min_ms']:9.1f} {m['alloc_kib']:10.0f} "
+                          f"{m['peak_kib']:9.0f}" + ("  REGRESSION" if flags else ""))
+            finally:
+                os.chdir(cwd)
+    return results, regressions
+
+
+def _compare(now, before, tolerance):
+    if not before:
+        return []
+    flags = []
+    for key, label in (("median_ms", "time"), ("peak_kib", "peak memory")):
+        if before[key] and now[key] > before[key] * (1 + tolerance):
+            flags.append(f"{label} {before[key]:.1f} -> {now[key]:.1f} ({now[key] / before[key] - 1:+.0%})")
+    return flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the matchups pipeline on recorded slates")
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='Directory of <date>.sqlite fixtures')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help='Fetch slates live and save them as fixtures')
+    rec.add_argument('dates', nargs='+', type=datetime.date.fromisoformat)
+    syn = sub.add_parser('synth', help='Build synthetic fixtures from the dated workbooks')
+    syn.add_argument('dates', nargs='*', type=datetime.date.fromisoformat)
+    syn.add_argument('--doubleheader', action='append', default=[], type=datetime.date.fromisoformat,
+                     help='Date whose first game is a doubleheader (repeatable)')
+    bench = sub.add_parser('run', help='Replay fixtures offline and time each stage')
+    bench.add_argument('dates', nargs='*', help='Only these fixture dates')
+    bench.add_argument('-n', '--repeat', type=int, default=5)
+    bench.add_argument('--baseline', default=BASELINE_PATH)
+    bench.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    bench.add_argument('--tolerance', type=float, default=TOLERANCE,
+                       help='Allowed slowdown/growth over the baseline (default 0.25 = 25%%)')
+    args = parser.parse_args()
+
+    if args.cmd == 'record':
+        record(args.dates, args.fixtures)
+        return
+    if args.cmd == 'synth':
+        for day in sorted(set(args.dates) | set(args.doubleheader)):
+            synthesize(day, day in args.doubleheader, args.fixtures)
+        return
+
+    logging.getLogger().setLevel(logging.WARNING)
+    fixtures = sorted(glob.glob(os.path.join(args.fixtures, "*.sqlite")))
+    if args.dates:
+        fixtures = [f for f in fixtures if str(_fixture_day(f)) in args.dates]
+    if not fixtures:
+        raise SystemExit(f"No fixtures in {args.fixtures}; record some first")
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    results, regressions = run(fixtures, args.repeat, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print("\nRegressions against baseline:")
+        print("\n".join(f"  {r}" for r in regressions))
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger("matchups.cache")
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mlb-tools", "http.sqlite")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Freshness per endpoint, first matching URL prefix wins (seconds)
+TTLS = [
+    ("https://statsapi.mlb.com/api/v1/teams/", 6 * 3600),  # active rosters
+    ("https://statsapi.mlb.com/api/v1/teams", 24 * 3600),
+    ("https://statsapi.mlb.com/api/v1/sports/1/players", 6 * 3600),
+    ("https://statsapi.mlb.com/api/v1/people", 6 * 3600),
+    ("https://statsapi.mlb.com/api/v1/schedule", 10 * 60),
+    ("https://www.espn.com/fantasy/baseball/story/", 60 * 60),
+]
+DEFAULT_TTL = 5 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at);
+"""
+
+
+class OfflineMiss(LookupError):
+    """An offline request the cache has no entry for; url is the full request URL."""
+
+    def __init__(self, url):
+        super().__init__(f"Offline and not cached: {url}")
+        self.url = url
+
+
+def ttl_for(url):
+    for prefix, ttl in TTLS:
+        if url.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache keyed by the full request URL (params
+    included). Entries older than their endpoint TTL are stale and should be
+    revalidated with the stored ETag/Last-Modified; the file is kept under
+    max_bytes by evicting the least recently read entries.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def lookup(self, url, ttl=None):
+        """Return (entry, fresh) or (None, False). Marks the entry as read; ttl overrides the endpoint's."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, encoding, etag, last_modified, stored_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+            if row is None:
+                return None, False
+            now = time.time()
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            self._db.commit()
+        body, encoding, etag, last_modified, stored_at = row
+        entry = {"body": body, "encoding": encoding, "etag": etag, "last_modified": last_modified}
+        return entry, now - stored_at < (ttl_for(url) if ttl is None else ttl)
+
+    def validators(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, body, encoding=None, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, encoding, etag, last_modified, now, now, len(body)))
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url):
+        """Revalidated with a 304: restart the entry's TTL."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                             (now, now, url))
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, size in self._db.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        log.debug(f"Evicted {evicted} cached responses ({total} bytes kept)")
+
+    def stats(self):
+        with self._lock:
+            n, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": n, "bytes": size}
+
@@ -0,0 +1,72 @@
+"""
+Startup budget for both command lines.
+
+`--help` must not import any stage's heavy dependencies, and its median
+wall time over a bare interpreter must stay within the budget:
+
+    python batter-matchups/check_startup.py
+    python batter-matchups/check_startup.py -n 20 --budget 0.05
+
+Exits non-zero when either check fails. tests/test_startup.py runs the
+same checks under pytest.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COMMANDS = {
+    "batter-matchups": [HERE, "--help"],
+    "espn_pitchermatchups_withtimes2.py": [os.path.join(os.path.dirname(HERE), "espn_pitchermatchups_withtimes2.py"),
+                                           "--help"],
+}
+HEAVY = ("pandas", "numpy", "xlsxwriter", "PIL", "bs4", "jinja2", "requests", "urllib3",
+         "github", "pydrive2", "googleapiclient")
+BUDGET = 0.1  # seconds over `python -c pass`
+
+
+def median_wall(args, repeat):
+    """Median seconds to run the interpreter with args."""
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs)
+
+
+def imported(args):
+    """Top-level package names a command imports, from -X importtime."""
+    err = subprocess.run([sys.executable, "-X", "importtime", *args], stdout=subprocess.DEVNULL,
+                         stderr=subprocess.PIPE, text=True, check=True).stderr
+    return {line.rsplit("|", 1)[1].strip().split(".")[0] for line in err.splitlines()
+            if line.startswith("import time:") and "|" in line}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup time and lazy imports")
+    parser.add_argument('-n', '--repeat', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help=f'Allowed seconds over a bare interpreter (default {BUDGET})')
+    args = parser.parse_args()
+
+    bare = median_wall(["-c", "pass"], args.repeat)
+    failures = []
+    for name, cmd in COMMANDS.items():
+        heavy = sorted(set(HEAVY) & imported(cmd))
+        over = median_wall(cmd, args.repeat) - bare
+        print(f"{name} --help: {over * 1000:.0f} ms over bare Python ({args.budget * 1000:.0f} ms budget)"
+              + (f", imports {', '.join(heavy)}" if heavy else ""))
+        if heavy:
+            failures.append(f"{name} imports {', '.join(heavy)} at startup")
+        if over > args.budget:
+            failures.append(f"{name} takes {over * 1000:.0f} ms, over the {args.budget * 1000:.0f} ms budget")
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+
+if __name__ == '__main__':
+    main()
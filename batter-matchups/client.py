@@ -0,0 +1,128 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cache import OfflineMiss, ResponseCache
+from metrics import count
+
+log = logging.getLogger("matchups.client")
+
+MAX_WORKERS = 8
+TIMEOUT = 10
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_offline = False
+
+
+def configure_cache(path=None, offline=False, enabled=True):
+    """
+    Turn on the on-disk response cache for every fetch. With offline=True
+    nothing goes to the network: requests are answered from the cache
+    regardless of age and a miss raises OfflineMiss.
+    """
+    global _cache, _offline
+    if offline and not enabled:
+        raise ValueError("offline replay needs the response cache")
+    _cache = (ResponseCache(path) if path else ResponseCache()) if enabled else None
+    _offline = offline
+    if _cache:
+        log.info(f"Response cache {_cache.path} ({'offline' if offline else 'online'}): {_cache.stats()}")
+
+
+def get_session():
+    """
+    Shared keep-alive Session for statsapi and ESPN. Connections are pooled
+    per host and 429/5xx responses are retried with exponential backoff
+    (honouring Retry-After).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=4, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset(["GET", "HEAD"]),
+                          respect_retry_after_header=True)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS,
+                                  max_retries=retry)
+            s = requests.Session()
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+    return _session
+
+
+def get(url, params=None, headers=None, timeout=TIMEOUT):
+    resp = get_session().get(url, params=params, headers=headers, timeout=timeout)
+    count("http_requests")
+    count("http_bytes", len(resp.content))
+    retries = getattr(resp.raw, "retries", None)
+    if retries:
+        count("http_retries", len(retries.history))
+    resp.raise_for_status()
+    log.debug(f"GET {resp.url} -> {resp.status_code} ({len(resp.content)} bytes)")
+    return resp
+
+
+def fetch(url, params=None, headers=None, timeout=TIMEOUT, max_age=None):
+    """
+    GET through the response cache. Returns (body bytes, encoding). Fresh
+    entries skip the network, stale ones are revalidated with a conditional
+    request and a 304 reuses the stored body. max_age (seconds) overrides
+    the endpoint TTL; 0 always revalidates.
+    """
+    if _cache is None:
+        resp = get(url, params=params, headers=headers, timeout=timeout)
+        return resp.content, resp.encoding
+    key = requests.Request("GET", url, params=params).prepare().url
+    entry, fresh = _cache.lookup(key, max_age)
+    if _offline:
+        if entry is None:
+            raise OfflineMiss(key)
+        count("cache_hits")
+        return entry["body"], entry["encoding"]
+    if fresh:
+        log.debug(f"Cache hit {key}")
+        count("cache_hits")
+        return entry["body"], entry["encoding"]
+    cond = dict(headers or {})
+    if entry is not None:
+        cond.update(_cache.validators(entry))
+    resp = get(url, params=params, headers=cond, timeout=timeout)
+    if resp.status_code == 304 and entry is not None:
+        log.debug(f"Cache revalidated {key}")
+        _cache.touch(key)
+        count("cache_revalidated")
+        return entry["body"], entry["encoding"]
+    count("cache_misses")
+    _cache.store(key, resp.content, resp.encoding,
+                 resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    return resp.content, resp.encoding
+
+
+def get_json(url, params=None, headers=None, timeout=TIMEOUT, max_age=None):
+    body, _ = fetch(url, params=params, headers=headers, timeout=timeout, max_age=max_age)
+    return json.loads(body)
+
+
+def get_text(url, params=None, headers=None, timeout=TIMEOUT, max_age=None):
+    body, encoding = fetch(url, params=params, headers=headers, timeout=timeout, max_age=max_age)
+    return body.decode(encoding or "utf-8", errors="replace")
+
+
+def gather(*calls, max_workers=MAX_WORKERS):
+    """
+    Run zero-argument callables on a bounded thread pool and return their
+    results in the order given. The first exception raised is re-raised.
+    """
+    if len(calls) == 1:
+        return [calls[0]()]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls)) or 1) as pool:
+        futures = [pool.submit(fn) for fn in calls]
+        return [f.result() for f in futures]
@@ -1,8 +1,138 @@
+import datetime
+
+import numpy as np
 import pandas as pd
+import xlsxwriter
 from xlsxwriter.utility import xl_col_to_name
 
-def write_spreadsheets(df, best_df, display_date, date_str):
+from styles import BATTER_COLS, BORDER, OFF_FILL, RATING_BANDS, SPLIT_COLS
+
+CENTER = {'align': 'center', 'valign': 'vcenter'}
+HEADER = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+
+class FormatCache:
+    """One xlsxwriter Format per distinct set of properties, however often it is asked for."""
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        self._formats = {}
+
+    def __call__(self, **props):
+        key = tuple(sorted(props.items()))
+        fmt = self._formats.get(key)
+        if fmt is None:
+            fmt = self._formats[key] = self.workbook.add_format(props)
+        return fmt
+
+
+def game_layout(df):
+    """
+    One groupby over GamePk: first/last sheet row, away/home team and start
+    time for every game that spans two or more rows (df is sorted away
+    before home within a game).
+    """
+    games = df.assign(_row=np.arange(len(df))).groupby("GamePk", sort=False).agg(
+        first=("_row", "first"), last=("_row", "last"), size=("_row", "size"),
+        away=("TEAM", "first"), home=("TEAM", "last"), start=("StartTime", "first"))
+    return games[games["size"] >= 2]
+
+
+def column_widths(frame):
+    """Longest line in each column (header included) plus padding."""
+    if frame.empty:
+        longest = pd.Series(0, index=frame.columns)
+    else:
+        lines = frame.astype(str).stack().str.split("\n").explode().str.len()
+        longest = lines.groupby(level=1).max().reindex(frame.columns, fill_value=0)
+    header = pd.Series(frame.columns.str.len(), index=frame.columns)
+    return (np.maximum(longest, header) + 2).tolist()
+
+
+def _write_table(ws, fmt, frame):
+    """Header on row 2, data from row 3, strictly in row order (constant_memory safe)."""
+    ws.write_row(1, 0, list(frame.columns), fmt(**HEADER))
+    cells = frame.astype(object).where(frame.notna(), None).to_numpy().tolist()
+    for r, values in enumerate(cells, start=2):
+        ws.write_row(r, 0, values)
+
+
+def _rating_formats(ws, fmt, rng, opp_col=None):
+    for low, high, fill, color in RATING_BANDS:
+        props = dict(CENTER, bg_color=fill)
+        if color != "black":
+            props["font_color"] = color
+        if low == high:
+            rule = {"criteria": "==", "value": low}
+        else:
+            rule = {"criteria": "between", "minimum": low, "maximum": high}
+        ws.conditional_format(rng, {"type": "cell", **rule, "format": fmt(**props)})
+    if opp_col:
+        ws.conditional_format(rng, {"type": "formula", "criteria": f'=${opp_col}3="OFF"',
+                                    "format": fmt(bg_color=OFF_FILL, **CENTER)})
+
+
+def _write_matchups(ws, fmt, df, display_date, merge_games=True):
+    out = df.drop(columns=["GamePk"])
+    n_rows, last_col = len(out), xl_col_to_name(len(out.columns) - 1)
+    ws.merge_range(f"A1:{last_col}1", f"Data for {display_date}", fmt(bold=True, **CENTER))
+    _write_table(ws, fmt, out)
+    if merge_games:
+        # Merged cells write blanks into later rows, so they cannot be streamed
+        for g in game_layout(df).itertuples():
+            ws.merge_range(g.first + 2, 0, g.last + 2, 0, g.start, fmt(border=1, **CENTER))
+            ws.merge_range(g.first + 2, 1, g.last + 2, 2, f"{g.away}\n@ {g.home}",
+                           fmt(border=1, text_wrap=True, **CENTER))
+        blank = np.flatnonzero(out["StartTime"].eq("").to_numpy())
+        if len(blank) > 1:
+            ws.merge_range(blank[0] + 2, 0, blank[-1] + 2, 0, "",
+                           fmt(border=1, bg_color=OFF_FILL, **CENTER))
+        elif len(blank):
+            ws.write_blank(blank[0] + 2, 0, None, fmt(border=1, bg_color=OFF_FILL, **CENTER))
+    ws.freeze_panes(2, 0)
+
+    a, b = sorted(out.columns.get_loc(c) for c in ("LHB", "RHB"))
+    rating_range = f"{xl_col_to_name(a)}3:{xl_col_to_name(b)}{n_rows + 2}"
+    _rating_formats(ws, fmt, rating_range, xl_col_to_name(out.columns.get_loc("OPP")))
+    ws.conditional_format(f"A3:{last_col}{n_rows + 2}",
+                          {"type": "no_blanks", "format": fmt(border=1, border_color=BORDER, valign='vcenter')})
+    for i, width in enumerate(column_widths(out)):
+        ws.set_column(i, i, width, fmt(**CENTER))
+
+
+def _write_best(ws, fmt, best_df, display_date):
+    bm = best_df.drop(columns=["GamePk"])
+    m, last_col = len(bm), xl_col_to_name(len(bm.columns) - 1)
+    ws.merge_range(f"A1:{last_col}1", f"Best Hitter/Pitcher Matchups for {display_date}",
+                   fmt(bold=True, **CENTER))
+    _write_table(ws, fmt, bm)
+    ws.freeze_panes(2, 0)
+
+    for c in ("LHB", "RHB"):
+        col = xl_col_to_name(bm.columns.get_loc(c))
+        _rating_formats(ws, fmt, f"{col}3:{col}{m + 2}")
+    for j, width in enumerate(column_widths(bm)):
+        wrap = bm.columns[j] in BATTER_COLS + SPLIT_COLS
+        ws.set_column(j, j, width, fmt(text_wrap=True, **CENTER) if wrap else fmt(**CENTER))
+    bd = fmt(border=1, border_color=BORDER, **CENTER)
+    full = f"A3:{last_col}{m + 2}"
+    ws.conditional_format(full, {"type": "no_blanks", "format": bd})
+    ws.conditional_format(full, {"type": "blanks", "format": bd})
+
+
+def write_spreadsheets(df, best_df, display_date, date_str, constant_memory=False):
+    """
+    Write the Matchups and BestMatchups sheets to pitcher_matchups_<date>.xlsx.
+    constant_memory streams each row to disk as it is written, keeping
+    memory flat for long multi-date workbooks; the per-game merged cells
+    are left out in that mode. The creation date is pinned to the slate's
+    date so identical sheets produce identical bytes (and uploads skip them).
+    """
     output = f"pitcher_matchups_{date_str}.xlsx"
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # [... Excel formatting code ...]
+    with xlsxwriter.Workbook(output, {"constant_memory": constant_memory}) as workbook:
+        workbook.set_properties({"created": datetime.datetime.strptime(date_str, "%Y-%m-%d")})
+        fmt = FormatCache(workbook)
+        _write_matchups(workbook.add_worksheet("Matchups"), fmt, df, display_date,
+                        merge_games=not constant_memory)
+        _write_best(workbook.add_worksheet("BestMatchups"), fmt, best_df, display_date)
     return output
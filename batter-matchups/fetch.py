@@ -1,11 +1,259 @@
+"""
+Everything the daily sheet is built from: ESPN's forecaster ratings, the
+statsapi team map, schedule and league rosters, combined into the Matchups
+(df) and BestMatchups (best_df) frames.
+"""
 import datetime
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
+import logging
+from functools import partial
 from zoneinfo import ZoneInfo
 
+import pandas as pd
+
+from client import get_json, get_text, gather
+from forecaster import URL as FORECASTER_URL, espn_label, parse_forecaster
+
+log = logging.getLogger("matchups.fetch")
+
+ROSTER_URL = "https://statsapi.mlb.com/api/v1/teams/{}/roster"
+PEOPLE_URL = "https://statsapi.mlb.com/api/v1/people"
+PEOPLE_BATCH = 200
+
+
+def get_mlb_team_map():
+    teams = get_json(
+        "https://statsapi.mlb.com/api/v1/teams",
+        params={"sportId": 1}
+    ).get("teams", [])
+    team_map = {t["abbreviation"].upper(): t["id"] for t in teams}
+    alias_map = {"ARI": "AZ", "WAS": "WSH"}
+    for espn, mlb in alias_map.items():
+        if mlb in team_map:
+            team_map[espn] = team_map[mlb]
+    return team_map
+
+
+def load_league_rosters(team_ids, season: int = None, max_age: float = None):
+    """
+    Every club's active roster, fetched concurrently, with batSide and
+    primaryPosition from batched /people lookups. Non-pitchers are
+    bucketed by club id:
+      {team_id: [{"id", "name", "batSide", "position"}, ...]}
+    so neither categorize() nor the position annotation needs another
+    round-trip.
+    """
+    season = season or datetime.date.today().year
+    team_ids = sorted(set(team_ids))
+    rosters = gather(*(partial(get_json, ROSTER_URL.format(t), max_age=max_age,
+                               params={"rosterType": "active", "season": season}) for t in team_ids))
+    members = {t: [e["person"]["id"] for e in r.get("roster", [])
+                   if e.get("position", {}).get("type") != "Pitcher"]
+               for t, r in zip(team_ids, rosters)}
+    ids = sorted({i for pids in members.values() for i in pids})
+    people = {}
+    for resp in gather(*(partial(get_json, PEOPLE_URL, max_age=max_age,
+                                 params={"personIds": ",".join(map(str, ids[i:i + PEOPLE_BATCH]))})
+                         for i in range(0, len(ids), PEOPLE_BATCH))):
+        people.update((p["id"], p) for p in resp.get("people", []))
+    rosters = {}
+    for team_id, pids in members.items():
+        rosters[team_id] = [{
+            "id": pid,
+            "name": people[pid].get("fullName", ""),
+            "batSide": people[pid].get("batSide", {}).get("code", "").upper(),
+            "position": people[pid].get("primaryPosition", {}).get("abbreviation", ""),
+        } for pid in pids if pid in people]
+    log.info(f"Loaded {sum(map(len, rosters.values()))} active hitters for {len(rosters)} teams")
+    return rosters
+
+
+HITTER_COLUMNS = {"L": "LH_Batters", "R": "RH_Batters", "S": "Switch"}
+
+
+def hitter_table(rosters):
+    """
+    The load_league_rosters() table in long format, one row per hitter:
+    team_id, player_id, name, batSide, position. Build it once and reuse it
+    across the dates of a backfill or season run.
+    """
+    return pd.DataFrame(
+        [(team_id, p["id"], p["name"], p["batSide"], p["position"])
+         for team_id, players in rosters.items() for p in players],
+        columns=["team_id", "player_id", "name", "batSide", "position"],
+    ).drop_duplicates(["team_id", "player_id"])
+
+
+def categorize(best_df, team_map, hitters):
+    """
+    Every listed hitter of every best_df row, in long format: row (the
+    best_df index), column (LH_Batters, RH_Batters or Switch), player_id,
+    name and position, sorted by row and name. Lefties are listed when LHB
+    >= 8, righties when RHB >= 8, switch-hitters once when either is. Rows
+    from several dates can be categorized in one call.
+    """
+    rows = pd.DataFrame({
+        "row": best_df.index,
+        "team_id": best_df["TEAM"].str.upper().map(team_map).to_numpy(),
+        "L": best_df["LHB"].ge(8).to_numpy(),
+        "R": best_df["RHB"].ge(8).to_numpy(),
+    })
+    rows["S"] = rows["L"] | rows["R"]
+    side = rows.melt(id_vars=["row", "team_id"], value_vars=list(HITTER_COLUMNS),
+                     var_name="batSide", value_name="listed")
+    picks = side[side["listed"]].merge(hitters[hitters["name"] != ""], on=["team_id", "batSide"])
+    picks["column"] = picks["batSide"].map(HITTER_COLUMNS)
+    return picks.sort_values(["row", "name", "player_id"], kind="stable", ignore_index=True)[
+        ["row", "column", "player_id", "name", "position"]]
+
+
+def load_schedule(start: datetime.date, end: datetime.date = None, max_age: float = None):
+    """
+    One /schedule request covering start..end, returned as
+    {"YYYY-MM-DD": [games]}.
+    """
+    params = {"sportId": 1}
+    if end and end != start:
+        params.update(startDate=start.strftime("%Y-%m-%d"), endDate=end.strftime("%Y-%m-%d"))
+    else:
+        params["date"] = start.strftime("%Y-%m-%d")
+    sched = get_json("https://statsapi.mlb.com/api/v1/schedule", params=params, max_age=max_age)
+    return {d["date"]: d.get("games", []) for d in sched.get("dates", [])}
+
+
+def fetch_inputs(start: datetime.date, end: datetime.date = None, max_age: float = None):
+    """
+    Team map, ESPN article, schedule for start..end and the active
+    rosters. The rosters need the team ids; the article and schedule are
+    fetched alongside them. max_age applies to the schedule and rosters,
+    the inputs that move during a day.
+    """
+    def teams_and_rosters():
+        team_map = get_mlb_team_map()
+        return team_map, load_league_rosters(team_map.values(), start.year, max_age)
+
+    (team_map, rosters), html, schedule = gather(
+        teams_and_rosters,
+        lambda: get_text(FORECASTER_URL, headers={"User-Agent": "Mozilla/5.0"}),
+        lambda: load_schedule(start, end, max_age),
+    )
+    return team_map, html, schedule, rosters
+
+
+def map_schedule(ratings, games, team_map):
+    """
+    Attach each team's start time and gamePk, order the rows by start
+    time, game and away/home, and make the ratings numeric.
+    """
+    df = ratings.copy()
+    id2code = {mlb: espn for espn, mlb in team_map.items()}
+    eastern = ZoneInfo("America/New_York")
+    time_map, team_game, team_order = {}, {}, {}
+    for g in games:
+        gd = g.get("gameDate")
+        if not gd: continue
+        dt = datetime.datetime.fromisoformat(gd.replace("Z", "+00:00")).astimezone(eastern)
+        ts = dt.strftime("%I:%M %p").lstrip("0")
+        pk = g.get("gamePk")
+        for side in ("away", "home"):
+            t = g["teams"][side]["team"]["id"]
+            ab = id2code.get(t)
+            if ab:
+                time_map[ab] = ts
+                team_game[ab] = pk
+                team_order[ab] = 0 if side == "away" else 1
+    df["StartTime"] = df["TEAM"].map(time_map).fillna("")
+    df["StartTime_dt"] = pd.to_datetime(df["StartTime"], format="%I:%M %p", errors="coerce")
+    df["GamePk"] = df["TEAM"].map(team_game)
+    df["TeamOrder"] = df["TEAM"].map(team_order)
+    df.sort_values(by=["StartTime_dt", "GamePk", "TeamOrder"], inplace=True, na_position="last")
+    df.drop(columns=["StartTime_dt", "TeamOrder"], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    for c in ("LHB", "RHB"):
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def best_matchups(df):
+    """Rows rated >= 8 on either side."""
+    return df[df[["LHB", "RHB"]].ge(8).any(axis=1)].reset_index(drop=True)
+
+
+def annotate_positions(best_df, picks):
+    """Fill each row's hitter columns from categorize(): newline-separated 'Name (POS)'."""
+    text = picks["name"] + " (" + picks["position"] + ")"
+    lists = (text.groupby([picks["row"], picks["column"]], sort=False).agg("\n".join)
+             .unstack("column")
+             .reindex(index=best_df.index, columns=list(HITTER_COLUMNS.values()))
+             .fillna("").astype(str))
+    return best_df.assign(**lists)
+
+
+def build_matchups(ratings, games, team_map, rosters, previous=None, changed=None):
+    """
+    Combine one day's forecaster ratings with that day's games and the
+    roster table. Returns (df, best_df, picks), picks being categorize()'s
+    hitters keyed by TEAM instead of row, so every listed hitter keeps its
+    MLB id. Given the day's previous (best_df, picks) and the set of teams
+    whose inputs changed, only those teams' hitter rows are rebuilt.
+    """
+    df = map_schedule(ratings, games, team_map)
+    rows = df if previous is None else df[df["TEAM"].isin(changed)]
+    best_df = best_matchups(rows)
+    picks = categorize(best_df, team_map, hitter_table(rosters))
+    best_df = annotate_positions(best_df, picks)
+    picks = picks.assign(row=picks["row"].map(best_df["TEAM"])).rename(columns={"row": "TEAM"})
+    # Move StartTime into column A & remove from best_df
+    df.insert(0, "StartTime", df.pop("StartTime"))
+    if "StartTime" in best_df.columns:
+        best_df.drop(columns=["StartTime"], inplace=True)
+    if previous is not None:
+        # Unchanged teams keep their rows, in the (possibly re-sorted) schedule order
+        order = df.loc[df[["LHB", "RHB"]].ge(8).any(axis=1), "TEAM"]
+        kept, kept_picks = (frame[~frame["TEAM"].isin(changed)] for frame in previous)
+        best_df = pd.concat([kept, best_df]).set_index("TEAM").loc[order].reset_index().infer_objects()
+        position = {team: i for i, team in enumerate(order)}
+        picks = pd.concat([kept_picks, picks]).sort_values(
+            "TEAM", key=lambda s: s.map(position), kind="stable", ignore_index=True).infer_objects()
+    return df, best_df, picks
+
+
+def team_inputs(ratings, games, team_map, rosters):
+    """
+    Everything that feeds one team's rows, keyed by team code: its
+    forecaster row, its games (time, gamePk, side) and its roster. Two of
+    these differ exactly for the teams a refresh has to rebuild.
+    """
+    team_games = {}
+    for g in games:
+        for side in ("away", "home"):
+            team_games.setdefault(g["teams"][side]["team"]["id"], []).append(
+                (g.get("gameDate"), g.get("gamePk"), side))
+    out = {}
+    for rec in ratings.to_dict("records"):
+        team_id = team_map.get(rec["TEAM"])
+        roster = sorted((p["id"], p["name"], p["batSide"], p["position"]) for p in rosters.get(team_id, []))
+        out[rec["TEAM"]] = (tuple(map(str, rec.values())), tuple(team_games.get(team_id, [])), tuple(roster))
+    return out
+
+
+def load_day(day: datetime.date, max_age: float = None):
+    """
+    Fetch and build one day: (df, best_df, picks), or None when the
+    forecaster has no ratings for that day.
+    """
+    team_map, html, schedule, rosters = fetch_inputs(day, max_age=max_age)
+    ratings = parse_forecaster(html).get(espn_label(day))
+    if ratings is None:
+        log.error(f"ESPN forecaster has no ratings for {espn_label(day)}")
+        return None
+    df, best_df, picks = build_matchups(ratings, schedule.get(day.strftime("%Y-%m-%d"), []), team_map, rosters)
+    return df, best_df, picks
+
 
 def load_matchups(target_date: datetime.date):
-    # [... scraped code from original] ...
-    # return df, best_df, display_date, date_str
-    return df, best_df, display_date, date_str
+    """(df, best_df, display_date, date_str) for one day; raises LookupError when ESPN has no ratings."""
+    loaded = load_day(target_date)
+    if loaded is None:
+        raise LookupError(f"ESPN forecaster has no ratings for {espn_label(target_date)}")
+    df, best_df, _ = loaded
+    return df, best_df, target_date.strftime("%B %d, %Y"), target_date.strftime("%Y-%m-%d")
@@ -0,0 +1,169 @@
+import datetime
+import re
+from html.parser import HTMLParser
+import pandas as pd
+
+ARTICLE_ID = "31165089"
+URL = (f"https://www.espn.com/fantasy/baseball/story/_/id/{ARTICLE_ID}/"
+       "fantasy-baseball-forecaster-team-hitting-stolen-base-ratings-platoon-matchups-daily-weekly-leagues")
+DROP_COLS = ("SB", "OVERALL", "DATE")
+TEAM_ALIASES = {"CHW": "CWS"}
+
+
+def espn_label(day: datetime.date):
+    """Day label as ESPN prints it in the DATE column, e.g. 'Tue, 7/1'."""
+    return f"{day:%a}, {day.month}/{day.day}"
+
+
+_TABLE_START = re.compile(r'<table[^>]*class="[^"]*inline-table')
+
+
+class _TableTokenizer(HTMLParser):
+    """
+    Streaming pass over the forecaster <table> only. Collects header names
+    and, per body row, each cell's stacked <div> texts, plain text and
+    team logo src.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cols, self.rows = [], []
+        self._section = None
+        self._row = self._cell = self._div = self._th = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("thead", "tbody"):
+            self._section = tag
+        elif tag == "th" and self._section == "thead":
+            self._th = []
+        elif tag == "tr" and self._section == "tbody":
+            self.handle_endtag("tr")
+            self._row = []
+        elif tag == "td" and self._row is not None:
+            self.handle_endtag("td")
+            self._cell = {"divs": [], "text": [], "src": None}
+        elif self._cell is not None:
+            if tag == "div":
+                self._div = []
+            elif tag == "img" and self._cell["src"] is None:
+                self._cell["src"] = dict(attrs).get("src")
+
+    def handle_endtag(self, tag):
+        if tag == "th" and self._th is not None:
+            self.cols.append("".join(self._th))
+            self._th = None
+        elif tag == "div" and self._div is not None:
+            self._cell["divs"].append("".join(self._div))
+            self._div = None
+        elif tag == "td" and self._cell is not None:
+            # Also called on a new <td>/<tr> so an omitted </td> or </tr> still closes
+            self._row.append(self._cell)
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self.handle_endtag("td")
+            self.rows.append(self._row)
+            self._row = None
+        elif tag in ("thead", "tbody"):
+            self._section = None
+
+    def handle_data(self, data):
+        # Same joining rule as BeautifulSoup's get_text(strip=True)
+        data = data.strip()
+        if not data:
+            return
+        if self._th is not None:
+            self._th.append(data)
+        if self._cell is not None:
+            self._cell["text"].append(data)
+            if self._div is not None:
+                self._div.append(data)
+
+
+def _table_html(html):
+    """Slice the forecaster table out of the article so nothing else is tokenized."""
+    article = html.find(f'data-id="{ARTICLE_ID}"')
+    m = _TABLE_START.search(html, max(article, 0))
+    if article < 0 or not m:
+        raise ValueError("ESPN forecaster table not found")
+    end = html.find("</table>", m.start())
+    return html[m.start():end + len("</table>") if end >= 0 else len(html)]
+
+
+def parse_forecaster(html):
+    """
+    Parse every team x day x column value of the forecaster table in one
+    streaming pass into columns, then split by day:
+      {day label: DataFrame(TEAM, OPP, LHB, RHB, ...)}
+    Each team row stacks one <div> per day in every cell; the DATE cell
+    (second column) names the days.
+    """
+    tok = _TableTokenizer()
+    tok.feed(_table_html(html))
+    tok.close()
+    cols = tok.cols
+    keep = [c for c in cols if c not in DROP_COLS]
+    data = {c: [] for c in keep}
+    labels = []
+    for cells in tok.rows:
+        if len(cells) < 2 or not cells[1]["divs"]:
+            continue
+        n = len(cells[1]["divs"])
+        labels.extend(cells[1]["divs"])
+        for i, name in enumerate(cols):
+            if name not in data:
+                continue
+            if i >= len(cells):
+                data[name].extend([None] * n)
+                continue
+            cell = cells[i]
+            if name == "TEAM":
+                src = cell["src"]
+                code = src.split("/")[-1].split(".")[0].upper() if src else "".join(cell["text"])
+                data[name].extend([TEAM_ALIASES.get(code, code)] * n)
+            else:
+                divs, text = cell["divs"], "".join(cell["text"])
+                data[name].extend(divs[idx] if idx < len(divs) else text for idx in range(n))
+    frame = pd.DataFrame(data, columns=keep)
+    return {label: grp.reset_index(drop=True)
+            for label, grp in frame.groupby(pd.Series(labels, dtype=object), sort=False)}
+
+
+def _team_code(td):
+    img = td.find("img")
+    if img and img.has_attr("src"):
+        code = img["src"].split("/")[-1].split(".")[0].upper()
+    else:
+        code = td.get_text(strip=True)
+    return TEAM_ALIASES.get(code, code)
+
+
+def parse_forecaster_soup(html):
+    """
+    Reference parser: full BeautifulSoup tree of the whole article. Same
+    output as parse_forecaster(); kept for bench_forecaster.py.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("article", {"data-id": ARTICLE_ID})
+    table = table.find("table", {"class": "inline-table"})
+    cols = [th.get_text(strip=True) for th in table.thead.find_all("th")]
+    days = {}
+    for tr in table.tbody.find_all("tr"):
+        tds = tr.find_all("td")
+        if not tds: continue
+        labels = [d.get_text(strip=True) for d in tds[1].find_all("div")]
+        if not labels: continue
+        cells = []
+        for name, td in zip(cols, tds):
+            if name == "TEAM":
+                cells.append((name, None, _team_code(td)))
+            else:
+                cells.append((name, [d.get_text(strip=True) for d in td.find_all("div")],
+                              td.get_text(strip=True)))
+        for idx, label in enumerate(labels):
+            row = {}
+            for name, divs, text in cells:
+                row[name] = divs[idx] if divs and idx < len(divs) else text
+            days.setdefault(label, []).append(row)
+    keep = [c for c in cols if c not in DROP_COLS]
+    return {label: pd.DataFrame(records, columns=cols)[keep] for label, records in days.items()}
@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger("matchups.gdrive")
+
+CLIENT_SECRETS = "client_secrets.json"
+CREDENTIALS = "credentials.json"
+CHUNK_SIZE = 4 * 1024 * 1024  # resumable chunks must be a multiple of 256 KiB
+MAX_WORKERS = 4
+NUM_RETRIES = 3
+QUERY_BATCH = 50  # titles per files.list query
+
+_auth = None
+_auth_lock = threading.Lock()
+
+
+def file_md5(path):
+    """Hex MD5 of a local file, comparable to Drive's md5Checksum."""
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def authenticate(client_secrets=CLIENT_SECRETS, credentials=CREDENTIALS):
+    """Load, refresh and save the OAuth credentials once per process."""
+    global _auth
+    with _auth_lock:
+        if _auth is None:
+            from pydrive2.auth import GoogleAuth, RefreshError
+            gauth = GoogleAuth()
+            gauth.LoadClientConfigFile(client_secrets)
+            if os.path.exists(credentials):
+                gauth.LoadCredentialsFile(credentials)
+            try:
+                if gauth.access_token_expired:
+                    gauth.Refresh()
+            except RefreshError:
+                gauth.LocalWebserverAuth()
+            if gauth.service is None:
+                gauth.Authorize()
+            gauth.SaveCredentialsFile(credentials)
+            _auth = gauth
+    return _auth
+
+
+class DriveBackend:
+    """Drive v2 files API through PyDrive2's authorised service."""
+
+    def __init__(self, folder_id=None, auth=None):
+        self.auth = auth or authenticate()
+        self.folder_id = folder_id or "root"
+
+    def _http(self):
+        # httplib2 connections are not thread-safe; PyDrive2 keeps one per thread
+        return self.auth.Get_Http_Object()
+
+    def existing(self, titles):
+        """{title: (file id, md5Checksum)} for those titles already in the folder, newest first."""
+        files, out = self.auth.service.files(), {}
+        for i in range(0, len(titles), QUERY_BATCH):
+            names = " or ".join("title = '{}'".format(t.replace("'", "\\'"))
+                                for t in titles[i:i + QUERY_BATCH])
+            request = files.list(q=f"'{self.folder_id}' in parents and trashed = false and ({names})",
+                                 orderBy="modifiedDate desc", maxResults=1000,
+                                 fields="nextPageToken, items(id, title, md5Checksum)")
+            while request is not None:
+                response = request.execute(http=self._http(), num_retries=NUM_RETRIES)
+                for item in response.get("items", []):
+                    out.setdefault(item["title"], (item["id"], item.get("md5Checksum")))
+                request = files.list_next(request, response)
+        return out
+
+    def upload(self, path, file_id=None, title=None):
+        """
+        Chunked resumable upload; a failed chunk is retried from the last
+        byte Drive acknowledged. Updates file_id in place when given.
+        """
+        from googleapiclient.http import MediaFileUpload
+        media = MediaFileUpload(path, chunksize=CHUNK_SIZE, resumable=True)
+        files = self.auth.service.files()
+        if file_id:
+            request = files.update(fileId=file_id, media_body=media, fields="id")
+        else:
+            request = files.insert(body={"title": title or os.path.basename(path),
+                                         "parents": [{"id": self.folder_id}]},
+                                   media_body=media, fields="id")
+        http, response = self._http(), None
+        while response is None:
+            _, response = request.next_chunk(http=http, num_retries=NUM_RETRIES)
+        return response["id"]
+
+
+class LocalDriveBackend:
+    """A directory standing in for the Drive folder (file ids are names), for dry runs and tests."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def existing(self, titles):
+        out = {}
+        for title in titles:
+            path = os.path.join(self.root, title)
+            if os.path.exists(path):
+                out[title] = (title, file_md5(path))
+        return out
+
+    def upload(self, path, file_id=None, title=None):
+        file_id = file_id or title or os.path.basename(path)
+        dest = os.path.join(self.root, file_id)
+        with open(path, "rb") as src, open(dest + ".part", "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(dest + ".part", dest)
+        return file_id
+
+
+def sync(paths, backend, max_workers=MAX_WORKERS):
+    """
+    Upload local files into the backend's folder. One listing gives each
+    title's id and md5Checksum: matching files are skipped, existing titles
+    are updated in place and the rest are created, concurrently.
+    Returns {path: file id} for the files sent.
+    """
+    if not paths:
+        return {}
+    remote = backend.existing([os.path.basename(p) for p in paths])
+    jobs = []
+    for path in paths:
+        file_id, md5 = remote.get(os.path.basename(path), (None, None))
+        if md5 == file_md5(path):
+            log.info(f"Unchanged on Google Drive, skipping '{path}'")
+        else:
+            jobs.append((path, file_id))
+
+    def send(job):
+        path, file_id = job
+        new_id = backend.upload(path, file_id, os.path.basename(path))
+        log.info(f"{'Updated' if file_id else 'Uploaded'} '{path}' on Google Drive")
+        return path, new_id
+
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        return dict(pool.map(send, jobs))
+
+
+def upload_to_gdrive(paths, folder_id=None, backend=None):
+    """Upload the files one or more runs wrote (workbooks, PNGs, exports) to Google Drive."""
+    if isinstance(paths, str):
+        paths = [paths]
+    return sync(list(paths), backend or DriveBackend(folder_id))
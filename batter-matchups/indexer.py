@@ -1,10 +1,146 @@
-from jinja2 import Environment, FileSystemLoader
+import argparse
+import datetime
+import json
 import os
+import re
 
-def build_index():
-    # read repo contents, bucket them, return rendered HTML string
-    return html
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-def commit_index(html):
-    # push index.html via PyGithub
-    pass
+from publisher import blob_sha
+
+BASE_URL = "https://jrdogan.github.io/mlb-tools/"
+MANIFEST_PATH = "matchups_manifest.json"
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+BYTECODE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mlb-tools", "jinja")
+ARTIFACT_RE = re.compile(r"^pitcher_matchups_(\d{4}-\d{2}-\d{2})(?:\.xlsx|_(?:Best)?Matchups\.(?:png|parquet|arrow|csv)|\.json(?:\.gz)?)$")
+RECENT_DAYS = 7
+JSON_SUFFIXES = (".json", ".json.gz")
+
+_env = None
+
+
+def _template(name):
+    """Templates are compiled once per process; the bytecode cache carries that across runs."""
+    global _env
+    if _env is None:
+        os.makedirs(BYTECODE_DIR, exist_ok=True)
+        _env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), trim_blocks=True,
+                           lstrip_blocks=True, bytecode_cache=FileSystemBytecodeCache(BYTECODE_DIR))
+    return _env.get_template(name)
+
+
+class Manifest:
+    """
+    Local record of published artifacts, {date: {filename: {size, mtime, sha}}}.
+    Adding files only stats (and, if new or modified, hashes) those files,
+    so each run costs O(new files) instead of a full repo listing.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.dates = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.dates = json.load(f).get("dates", {})
+
+    def add(self, path):
+        """Record one artifact. Returns its date when the manifest changed, else None."""
+        name = os.path.basename(path)
+        m = ARTIFACT_RE.match(name)
+        if not m:
+            return None
+        day = m.group(1)
+        st = os.stat(path)
+        entry = self.dates.get(day, {}).get(name)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == int(st.st_mtime):
+            return None
+        with open(path, "rb") as f:
+            sha = blob_sha(f.read())
+        if entry and entry["sha"] == sha:
+            entry["mtime"] = int(st.st_mtime)
+            return None
+        self.dates.setdefault(day, {})[name] = {"size": st.st_size, "mtime": int(st.st_mtime), "sha": sha}
+        return day
+
+    def update(self, paths):
+        """Record artifacts; returns the set of dates that changed."""
+        return {day for day in map(self.add, paths) if day}
+
+    def scan(self, directory="."):
+        """Bootstrap or resync from a directory of artifacts."""
+        return self.update(e.path for e in os.scandir(directory) if ARTIFACT_RE.match(e.name))
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dates": self.dates}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def _month_label(month):
+    return datetime.datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+
+
+def build_pages(manifest=None, months=None, base_url=BASE_URL):
+    """
+    Render index.html (latest images, last 7 days, links to each month)
+    plus archive_YYYY-MM.html for the given months (default: all). Pass
+    only the months a run touched to keep the work constant as history grows.
+    """
+    manifest = manifest or Manifest()
+    days = sorted(manifest.dates, reverse=True)
+    recent_images, week_images, week_sheets, week_tables = [], [], [], []
+    if days:
+        latest = datetime.date.fromisoformat(days[0])
+        cutoff = (latest - datetime.timedelta(days=RECENT_DAYS - 1)).isoformat()
+        recent_images = sorted(n for n in manifest.dates[days[0]] if n.endswith(".png"))
+        for day in days:
+            if day < cutoff:
+                break
+            names = sorted(manifest.dates[day])
+            week_images += [n for n in names if n.endswith(".png")]
+            week_sheets += [n for n in names if n.endswith(".xlsx")]
+            week_tables += [day] if f"pitcher_matchups_{day}.json" in names else []
+    all_months = sorted({d[:7] for d in days}, reverse=True)
+    pages = {"index.html": _template("index.html").render(
+        base_url=base_url, recent_images=recent_images, week_images=week_images,
+        week_sheets=week_sheets, week_tables=week_tables, months=[(m, _month_label(m)) for m in all_months])}
+    for month in (all_months if months is None else sorted(months)):
+        month_days = [(d, sorted(n for n in manifest.dates[d] if not n.endswith(JSON_SUFFIXES)),
+                       f"pitcher_matchups_{d}.json" in manifest.dates[d]) for d in days if d.startswith(month)]
+        pages[f"archive_{month}.html"] = _template("month.html").render(
+            base_url=base_url, label=_month_label(month), days=month_days)
+    return pages
+
+
+def build_index(manifest=None):
+    """Rendered index.html only."""
+    return build_pages(manifest, months=())["index.html"]
+
+
+def commit_index(pages, backend=None):
+    """Publish rendered pages ({filename: html}) on their own, in one commit."""
+    from publisher import GitHubBackend, publish
+    return publish({name: html.encode() for name, html in pages.items()}, backend or GitHubBackend())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild index.html and monthly archive pages from the manifest")
+    parser.add_argument('--scan', metavar='DIR', help='Add any artifacts found in DIR to the manifest first')
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--all-months', action='store_true', help='Render every month page, not just changed ones')
+    parser.add_argument('-o', '--out', default='.', help='Directory to write the pages to')
+    args = parser.parse_args()
+
+    manifest = Manifest(args.manifest)
+    touched = manifest.scan(args.scan) if args.scan else set()
+    manifest.save()
+    pages = build_pages(manifest, None if args.all_months else {d[:7] for d in touched})
+    for name, html in pages.items():
+        with open(os.path.join(args.out, name), "w", encoding="utf-8") as f:
+            f.write(html)
+    print(f"{len(touched)} dates updated, wrote {', '.join(sorted(pages))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-run stage timings and HTTP counters.
+
+Drivers wrap the run in run() and each stage in stage(); the HTTP client
+feeds count(). On the way out (failures included) the run is written as a
+JSON report and, optionally, a Prometheus textfile for node_exporter's
+textfile collector, so the scheduler can alert on a slow or failed run.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger("matchups.metrics")
+
+PREFIX = "mlb_matchups"
+COUNTERS = ("http_requests", "http_bytes", "http_retries", "cache_hits", "cache_revalidated", "cache_misses")
+
+_lock = threading.Lock()
+_counters = dict.fromkeys(COUNTERS, 0)
+_stages = []
+
+
+def count(name, n=1):
+    with _lock:
+        _counters[name] += n
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    with _lock:
+        _counters.update(dict.fromkeys(COUNTERS, 0))
+        _stages.clear()
+
+
+@contextmanager
+def stage(name):
+    """Time one stage (wall and CPU) and attribute the HTTP counters that moved during it."""
+    before, wall, cpu, ok = counters(), time.perf_counter(), time.process_time(), False
+    try:
+        yield
+        ok = True
+    finally:
+        after = counters()
+        rec = {"stage": name, "ok": ok,
+               "wall_seconds": round(time.perf_counter() - wall, 4),
+               "cpu_seconds": round(time.process_time() - cpu, 4),
+               **{k: after[k] - before[k] for k in COUNTERS}}
+        with _lock:
+            _stages.append(rec)
+        log.info(f"{name}: {rec['wall_seconds']:.2f}s wall, {rec['cpu_seconds']:.2f}s CPU, "
+                 f"{rec['http_requests']} requests ({rec['http_bytes'] / 1024:.0f} KiB), "
+                 f"{rec['cache_hits']} cache hits")
+
+
+def report(job, status, started, finished):
+    with _lock:
+        stages = list(_stages)
+    return {"job": job, "status": status, "started": started, "finished": finished,
+            "wall_seconds": round(finished - started, 4), "stages": stages, "totals": counters()}
+
+
+def prometheus(rep):
+    """Render a run report in the Prometheus text exposition format."""
+    job = rep["job"]
+    lines = []
+
+    def metric(name, kind, help_, samples):
+        lines.append(f"# HELP {PREFIX}_{name} {help_}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label = ",".join(f'{k}="{v}"' for k, v in (("job", job), *labels))
+            lines.append(f"{PREFIX}_{name}{{{label}}} {value}")
+
+    metric("run_success", "gauge", "1 if the last run finished without error.",
+           [((), int(rep["status"] == "ok"))])
+    metric("run_timestamp_seconds", "gauge", "When the last run finished.", [((), rep["finished"])])
+    metric("run_duration_seconds", "gauge", "Wall time of the last run.", [((), rep["wall_seconds"])])
+    for key, help_ in (("wall_seconds", "Wall time per stage of the last run."),
+                       ("cpu_seconds", "CPU time per stage of the last run.")):
+        metric(f"stage_{key}", "gauge", help_, [((("stage", s["stage"]),), s[key]) for s in rep["stages"]])
+    # Per-run totals restart at zero every run, so they are gauges: a counter would read as a reset
+    for key in COUNTERS:
+        metric(f"last_run_{key}", "gauge", f"{key.replace('_', ' ').capitalize()} in the last run.",
+               [((), rep["totals"][key])])
+    return "\n".join(lines) + "\n"
+
+
+def _write(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)  # the textfile collector must never read a half-written file
+
+
+@contextmanager
+def run(job, json_path=None, prom_path=None):
+    """Collect one run; the report is written when the block exits, failed or not."""
+    reset()
+    started, status = time.time(), "failed"
+    try:
+        yield
+        status = "ok"
+    finally:
+        rep = report(job, status, started, time.time())
+        if json_path:
+            _write(json_path, json.dumps(rep, indent=1))
+        if prom_path:
+            _write(prom_path, prometheus(rep))
+        log.info(f"Run {status} in {rep['wall_seconds']:.1f}s: {rep['totals']}")
@@ -0,0 +1,167 @@
+"""
+The daily run as registered stages.
+
+Stages run in registration order and share one Context. Each stage
+imports its heavy dependencies (pandas, xlsxwriter, Pillow, jinja2,
+PyGithub, PyDrive2) when it runs, so `--help` and runs that skip a stage
+never load them:
+
+    python batter-matchups --stages fetch,export          # workbook only
+    python batter-matchups --stages fetch,web,index,publish   # JSON tables only
+    python batter-matchups --stages fetch,splits,export,snapshot,web,index,publish   # with platoon splits
+    python batter-matchups --stages index,publish -d 2025-09-26   # republish existing files
+
+A stage that needs something another stage provides (e.g. export needs
+the frames from fetch) can only be selected together with it.
+"""
+import argparse
+import datetime
+import logging
+from collections import namedtuple
+
+from metrics import stage as timed
+
+log = logging.getLogger("matchups.pipeline")
+
+Stage = namedtuple("Stage", "name run needs provides")
+STAGES = {}
+
+
+def register(name, needs=(), provides=()):
+    """Add a stage function to the pipeline, after those already registered."""
+    def wrap(fn):
+        STAGES[name] = Stage(name, fn, frozenset(needs), frozenset(provides))
+        return fn
+    return wrap
+
+
+class Context:
+    """State shared by the stages of one run for one date."""
+
+    def __init__(self, day: datetime.date, archive=None, constant_memory=False, publish_to="github",
+                 formats=("xlsx",)):
+        self.date = day
+        self.date_str = day.strftime("%Y-%m-%d")
+        self.display_date = day.strftime("%B %d, %Y")
+        self.output = f"pitcher_matchups_{self.date_str}.xlsx"
+        self.archive = archive
+        self.constant_memory = constant_memory
+        self.formats = formats
+        self.publish_to = publish_to
+        self.df = self.best_df = self.picks = self.manifest = None
+        self.written = []  # artifacts this run wrote, in stage order; what gets indexed and published
+        self.pages = {}
+
+
+def parse_stages(text):
+    """--stages 'fetch,export' -> ['fetch', 'export']."""
+    names = [n.strip() for n in text.split(",") if n.strip()]
+    unknown = [n for n in names if n not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown stage(s) {', '.join(unknown)}; "
+                                         f"choose from {', '.join(STAGES)}")
+    return names
+
+
+def check_stages(names, provided=()):
+    """Raise ValueError when a selected stage needs what no earlier selected stage provides."""
+    have = set(provided)
+    for s in (STAGES[n] for n in STAGES if n in names):
+        missing = s.needs - have
+        if missing:
+            sources = sorted({o.name for o in STAGES.values() if o.provides & missing})
+            raise ValueError(f"Stage '{s.name}' needs {', '.join(sorted(missing))}; "
+                             f"also select {' or '.join(sources)}")
+        have |= s.provides
+
+
+def run_stages(ctx, names, provided=()):
+    """
+    Run the selected stages in pipeline order. Returns False when a stage
+    ended the run early (e.g. no ratings for the date), else True.
+    """
+    check_stages(names, provided)
+    for s in (STAGES[n] for n in STAGES if n in names):
+        with timed(s.name):
+            if s.run(ctx) is False:
+                log.warning(f"Stopped after '{s.name}'")
+                return False
+    return True
+
+
+@register("fetch", provides=("df", "best_df", "picks"))
+def fetch_stage(ctx):
+    from fetch import load_day
+    loaded = load_day(ctx.date)
+    if loaded is None:
+        return False
+    ctx.df, ctx.best_df, ctx.picks = loaded
+
+
+@register("splits", needs=("best_df", "picks"))
+def splits_stage(ctx):
+    """Optional: season AVG/OPS vs LHP and RHP beside each hitter list."""
+    from splits import enrich
+    ctx.best_df, ctx.picks = enrich(ctx.date_str, ctx.best_df, ctx.picks)
+
+
+@register("archive", needs=("df", "best_df", "picks"))
+def archive_stage(ctx):
+    from archive import Archive
+    store = Archive(ctx.archive) if ctx.archive else Archive()
+    store.ingest_frames(ctx.date_str, ctx.df, ctx.best_df, ctx.picks)
+    store.close()
+
+
+@register("export", needs=("df", "best_df", "picks"))
+def export_stage(ctx):
+    from writers import write
+    paths = write(ctx.formats, ctx.df, ctx.best_df, ctx.picks, ctx.display_date, ctx.date_str,
+                  ctx.constant_memory)
+    ctx.written += paths
+    log.info(f"Wrote {', '.join(paths)}")
+
+
+@register("snapshot", needs=("df", "best_df"))
+def snapshot_stage(ctx):
+    from snapshot import snapshot_images
+    ctx.written += snapshot_images(ctx.output, ctx.df, ctx.best_df, ctx.display_date)
+
+
+@register("web", needs=("df", "best_df"))
+def web_stage(ctx):
+    """Day JSON beside the workbook; the search index and viewer page go out with the pages."""
+    from web_export import VIEWER_PAGE, SearchIndex, render_viewer, write_day
+    ctx.written += write_day(ctx.df, ctx.best_df, ctx.display_date, ctx.date_str)
+    search = SearchIndex()
+    search.add(ctx.date_str, ctx.best_df)
+    ctx.pages.update(search.save())
+    ctx.pages[VIEWER_PAGE] = render_viewer()
+
+
+@register("index")
+def index_stage(ctx):
+    """
+    Add this run's artifacts to the manifest and re-render only the months
+    they touch. The manifest is saved once publish has sent the pages.
+    """
+    from indexer import Manifest, build_pages
+    ctx.manifest = Manifest()
+    touched = ctx.manifest.update(ctx.written)
+    ctx.pages.update(build_pages(ctx.manifest, months={d[:7] for d in touched}))
+
+
+@register("publish")
+def publish_stage(ctx):
+    if ctx.publish_to == "gdrive":
+        from gdrive import upload_to_gdrive
+        upload_to_gdrive(ctx.written)
+    else:
+        # Artifacts and any refreshed pages land in a single commit
+        from publisher import upload_to_github
+        if upload_to_github(ctx.written, extra=ctx.pages,
+                            message=f"Publish pitcher_matchups_{ctx.date_str}") is False:
+            # Keep the manifest as published so the next run re-renders these months
+            return False
+        if ctx.manifest is not None:
+            ctx.manifest.save()
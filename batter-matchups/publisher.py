@@ -1,5 +1,149 @@
+import base64
+import hashlib
+import logging
 import os
-from github import Github
+import subprocess
 
-def upload_to_github(output):
-    # [... upload_to_github() code ...]
+log = logging.getLogger("matchups.publisher")
+
+REPO_NAME = "jrdogan/mlb-tools"
+
+
+def blob_sha(data: bytes):
+    """The SHA git gives this content as a blob, so it can be compared to a tree listing."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class GitHubBackend:
+    """Git Data API (blobs/trees/commits/refs) through PyGithub."""
+
+    def __init__(self, repo_name=REPO_NAME, branch=None, token=None):
+        from github import Github
+        self.repo = Github(token or os.getenv("GITHUB_TOKEN")).get_repo(repo_name)
+        # "(root)" is the Pages folder setting, not a branch
+        self.branch = branch if branch not in (None, "(root)") else self.repo.default_branch
+        self._ref = None
+
+    def head(self):
+        self._ref = self.repo.get_git_ref(f"heads/{self.branch}")
+        commit = self.repo.get_git_commit(self._ref.object.sha)
+        return commit.sha, commit.tree.sha
+
+    def tree(self, tree_sha):
+        return {e.path: e.sha for e in self.repo.get_git_tree(tree_sha).tree if e.type == "blob"}
+
+    def create_blob(self, data):
+        return self.repo.create_git_blob(base64.b64encode(data).decode(), "base64").sha
+
+    def create_tree(self, base_tree, entries):
+        from github import InputGitTreeElement
+        elements = [InputGitTreeElement(path, "100644", "blob", sha=sha) for path, sha in entries]
+        return self.repo.create_git_tree(elements, self.repo.get_git_tree(base_tree)).sha
+
+    def create_commit(self, message, tree, parent):
+        return self.repo.create_git_commit(message, self.repo.get_git_tree(tree),
+                                           [self.repo.get_git_commit(parent)]).sha
+
+    def update_ref(self, commit, old):
+        self._ref.edit(commit)
+
+    def url(self, path):
+        return f"https://{self.repo.owner.login}.github.io/{self.repo.name}/{path}"
+
+
+class LocalGitBackend:
+    """Same plumbing against a local (bare) repository, for dry runs and tests."""
+
+    def __init__(self, git_dir, branch="main"):
+        self.git_dir = git_dir
+        self.branch = branch
+
+    def _git(self, *args, data=None):
+        env = dict(os.environ, GIT_AUTHOR_NAME="mlb-tools", GIT_AUTHOR_EMAIL="mlb-tools@localhost",
+                   GIT_COMMITTER_NAME="mlb-tools", GIT_COMMITTER_EMAIL="mlb-tools@localhost")
+        return subprocess.run(["git", f"--git-dir={self.git_dir}", *args], input=data, env=env,
+                              capture_output=True, check=True).stdout
+
+    def head(self):
+        try:
+            commit = self._git("rev-parse", "--verify", f"refs/heads/{self.branch}").decode().strip()
+        except subprocess.CalledProcessError:
+            return None, None
+        return commit, self._git("rev-parse", f"{commit}^{{tree}}").decode().strip()
+
+    def tree(self, tree_sha):
+        if not tree_sha:
+            return {}
+        out = {}
+        for entry in self._git("ls-tree", "-z", tree_sha).split(b"\0"):
+            if entry:
+                meta, path = entry.decode().split("\t", 1)
+                mode, kind, sha = meta.split()
+                if kind == "blob":
+                    out[path] = sha
+        return out
+
+    def create_blob(self, data):
+        return self._git("hash-object", "-w", "--stdin", data=data).decode().strip()
+
+    def create_tree(self, base_tree, entries):
+        lines = [e for e in self._git("ls-tree", "-z", base_tree).split(b"\0") if e] if base_tree else []
+        replaced = {path for path, _ in entries}
+        lines = [e for e in lines if e.decode().split("\t", 1)[1] not in replaced]
+        lines += [f"100644 blob {sha}\t{path}".encode() for path, sha in entries]
+        return self._git("mktree", "-z", data=b"\0".join(lines) + b"\0").decode().strip()
+
+    def create_commit(self, message, tree, parent):
+        args = ["commit-tree", tree, "-m", message] + (["-p", parent] if parent else [])
+        return self._git(*args).decode().strip()
+
+    def update_ref(self, commit, old):
+        self._git("update-ref", f"refs/heads/{self.branch}", commit, *([old] if old else []))
+
+    def url(self, path):
+        return os.path.join(self.git_dir, path)
+
+
+def publish(files, backend, message=None):
+    """
+    Commit files ({remote path: bytes}, top-level paths) in a single commit.
+    One tree listing tells which blobs already match; unchanged files are
+    not uploaded and nothing is committed when everything matches.
+    Returns the new commit SHA or None.
+    """
+    parent, base_tree = backend.head()
+    remote = backend.tree(base_tree)
+    changed = {path: data for path, data in files.items() if remote.get(path) != blob_sha(data)}
+    for path in files.keys() - changed.keys():
+        log.info(f"Unchanged, skipping {path}")
+    if not changed:
+        return None
+    entries = [(path, backend.create_blob(data)) for path, data in changed.items()]
+    tree = backend.create_tree(base_tree, entries)
+    commit = backend.create_commit(message or f"Publish {', '.join(sorted(changed))}", tree, parent)
+    backend.update_ref(commit, parent)
+    for path in sorted(changed):
+        log.info(f"Published → {backend.url(path)}")
+    return commit
+
+
+def upload_to_github(paths, extra=None, message=None, repo_name=REPO_NAME, branch=None, backend=None):
+    """
+    Push the files a run wrote (workbook, PNGs, JSON, exports) and any
+    extra {path: bytes or str} (e.g. the rendered index.html) to the Pages
+    repo as one commit. Returns the
+    commit SHA, None when everything was already published, or False when
+    the upload was skipped.
+    """
+    if backend is None:
+        if not os.getenv("GITHUB_TOKEN"):
+            log.error("GITHUB_TOKEN not set; skipping GitHub upload")
+            return False
+        backend = GitHubBackend(repo_name, branch)
+    files = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            files[os.path.basename(path)] = f.read()
+    for path, data in (extra or {}).items():
+        files[path] = data.encode() if isinstance(data, str) else data
+    return publish(files, backend, message=message)
@@ -1,9 +1,190 @@
-import excel2img
-
-def snapshot_images(output, df, best_df):
-    # use df to compute ranges
-    n = len(df) + 2
-    excel2img.export_img(output, f"{output}_Matchups.png", 'Matchups', f"A1:E{n}")
-    m = len(best_df) + 2
-    last = xl_col_to_name(len(best_df.columns)-1)
-    excel2img.export_img(output, f"{output}_BestMatchups.png", 'BestMatchups', f"A1:{last}{m}")
+import datetime
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+from styles import BORDER, OFF_FILL, RATING_BANDS
+
+PAD_X, PAD_Y = 8, 4
+FONT_SIZE = 14
+PALETTE_COLORS = 64
+
+_FONT_FILES = {False: ("DejaVuSans.ttf", "arial.ttf", "Arial.ttf"),
+               True: ("DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf")}
+
+
+def _font(bold=False):
+    for name in _FONT_FILES[bold]:
+        try:
+            return ImageFont.truetype(name, FONT_SIZE)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _text(val):
+    if val is None or (isinstance(val, float) and math.isnan(val)):
+        return ""
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
+    return str(val)
+
+
+def rating_style(val, off=False):
+    """(fill, font colour) for a LHB/RHB cell, or None when unbanded."""
+    try:
+        v = float(val)
+    except (TypeError, ValueError):
+        v = math.nan
+    for low, high, fill, color in RATING_BANDS:
+        if low <= v <= high:
+            return fill, color
+    return (OFF_FILL, "black") if off else None
+
+
+class _Table:
+    """
+    Grid of cell texts with optional fills and merged ranges, laid out
+    and drawn the way the sheet looks in Excel: a title banner row, a bold
+    header row, centred (multi-line) cells and grey borders.
+    """
+
+    def __init__(self, title, columns, rows):
+        self.title = title
+        self.columns = list(columns)
+        self.rows = [[_text(v) for v in r] for r in rows]
+        self.styles = {}
+        self.merges = []
+
+    def style(self, r, c, fill, color="black"):
+        self.styles[(r, c)] = (fill, color)
+
+    def merge(self, r0, c0, r1, c1, text, fill=None):
+        self.merges.append((r0, c0, r1, c1, text, fill))
+
+    def render(self):
+        font, bold = _font(), _font(True)
+        line_h = sum(font.getmetrics()) + 2
+        grid = [self.columns] + self.rows
+        covered = {(r + 1, c) for r0, c0, r1, c1, _, _ in self.merges
+                   for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)}
+        widths = [0] * len(self.columns)
+        heights = [line_h + 2 * PAD_Y] * len(grid)
+        for r, row in enumerate(grid):
+            f = bold if r == 0 else font
+            for c, txt in enumerate(row):
+                if (r, c) in covered:
+                    continue
+                lines = txt.split("\n")
+                widths[c] = max(widths[c], max(f.getlength(l) for l in lines) + 2 * PAD_X)
+                heights[r] = max(heights[r], len(lines) * line_h + 2 * PAD_Y)
+        for r0, c0, r1, c1, text, _ in self.merges:
+            lines = text.split("\n")
+            need_w = max(font.getlength(l) for l in lines) + 2 * PAD_X
+            have_w = sum(widths[c0:c1 + 1])
+            if need_w > have_w:
+                widths[c1] += need_w - have_w
+            need_h = len(lines) * line_h + 2 * PAD_Y
+            have_h = sum(heights[r0 + 1:r1 + 2])
+            if need_h > have_h:
+                heights[r1 + 1] += need_h - have_h
+        widths = [math.ceil(w) for w in widths]
+        title_w = math.ceil(bold.getlength(self.title)) + 2 * PAD_X
+        if title_w > sum(widths):
+            widths[-1] += title_w - sum(widths)
+        title_h = line_h + 2 * PAD_Y
+        xs = [0]
+        for w in widths:
+            xs.append(xs[-1] + w)
+        ys = [title_h]
+        for h in heights:
+            ys.append(ys[-1] + h)
+
+        img = Image.new("RGB", (xs[-1] + 1, ys[-1] + 1), "white")
+        draw = ImageDraw.Draw(img)
+        self._cell(draw, (0, 0, xs[-1], title_h), self.title, bold, line_h, border=False)
+        for r, row in enumerate(grid):
+            for c, txt in enumerate(row):
+                if (r, c) in covered:
+                    continue
+                fill, color = self.styles.get((r - 1, c), (None, "black"))
+                self._cell(draw, (xs[c], ys[r], xs[c + 1], ys[r + 1]), txt,
+                           bold if r == 0 else font, line_h, fill, color, border=r > 0)
+        for r0, c0, r1, c1, text, fill in self.merges:
+            self._cell(draw, (xs[c0], ys[r0 + 1], xs[c1 + 1], ys[r1 + 2]), text,
+                       font, line_h, fill, border_color="black")
+        return img
+
+    @staticmethod
+    def _cell(draw, box, text, font, line_h, fill=None, color="black",
+              border=True, border_color=BORDER):
+        x0, y0, x1, y1 = box
+        if fill or border:
+            draw.rectangle(box, fill=fill or "white",
+                           outline=border_color if border else None)
+        lines = text.split("\n") if text else []
+        y = (y0 + y1 - len(lines) * line_h) / 2 + 1
+        for line in lines:
+            draw.text(((x0 + x1 - font.getlength(line)) / 2, y), line, font=font, fill=color)
+            y += line_h
+
+
+def matchups_table(df, display_date):
+    """Matchups sheet: start times and game labels merged per game, rating bands."""
+    out = df.drop(columns=["GamePk"])
+    t = _Table(f"Data for {display_date}", out.columns, out.itertuples(index=False))
+    rating_cols = [out.columns.get_loc(c) for c in ("LHB", "RHB")]
+    opp = out["OPP"].tolist()
+    for r in range(len(out)):
+        for c in rating_cols:
+            style = rating_style(out.iat[r, c], opp[r] == "OFF")
+            if style:
+                t.style(r, c, *style)
+    for _, grp in df.groupby("GamePk", sort=False):
+        rows = grp.index.tolist()
+        if len(rows) < 2:
+            continue
+        t.merge(rows[0], 0, rows[-1], 0, _text(df.at[rows[0], "StartTime"]))
+        away, home = df.at[rows[0], "TEAM"], df.at[rows[1], "TEAM"]
+        t.merge(rows[0], 1, rows[1], 2, f"{away}\n@ {home}")
+    blank = [i for i, st in enumerate(out["StartTime"]) if st == ""]
+    if blank:
+        t.merge(blank[0], 0, blank[-1], 0, "", OFF_FILL)
+    return t
+
+
+def best_matchups_table(best_df, display_date):
+    """BestMatchups sheet: rating bands and wrapped batter lists."""
+    out = best_df.drop(columns=["GamePk"])
+    t = _Table(f"Best Hitter/Pitcher Matchups for {display_date}", out.columns,
+               out.itertuples(index=False))
+    for c in (out.columns.get_loc("LHB"), out.columns.get_loc("RHB")):
+        for r in range(len(out)):
+            style = rating_style(out.iat[r, c])
+            if style:
+                t.style(r, c, *style)
+    return t
+
+
+def _save(table, path):
+    img = table.render().quantize(colors=PALETTE_COLORS, method=Image.Quantize.MEDIANCUT)
+    img.save(path, optimize=True)
+    return path
+
+
+def snapshot_images(output, df, best_df, display_date=None):
+    """
+    Draw <base>_Matchups.png and <base>_BestMatchups.png straight from the
+    DataFrames (no Excel needed). Both images render concurrently and are
+    written as optimized, palette-quantized PNGs.
+    """
+    base, _ = os.path.splitext(output)
+    if display_date is None:
+        day = datetime.datetime.strptime(base.rsplit("_", 1)[-1], "%Y-%m-%d")
+        display_date = day.strftime("%B %d, %Y")
+    jobs = [(matchups_table(df, display_date), f"{base}_Matchups.png"),
+            (best_matchups_table(best_df, display_date), f"{base}_BestMatchups.png")]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        return list(pool.map(lambda job: _save(*job), jobs))
@@ -0,0 +1,115 @@
+"""
+Season platoon splits (AVG/OPS vs LHP and vs RHP) for the BestMatchups
+hitters.
+
+Hitters are looked up BATCH at a time through statsapi's /people endpoint
+with the statSplits hydration, at most MAX_WORKERS requests in flight, so a
+full slate of ~150 hitters is three requests. Results are kept per day in
+~/.cache/mlb-tools/splits/<date>.json, so re-runs only fetch hitters not
+seen yet that day.
+"""
+import json
+import logging
+import os
+
+import pandas as pd
+
+from cache import DEFAULT_PATH as CACHE_PATH
+from client import gather, get_json
+from styles import BATTER_COLS, SPLIT_COLS
+
+log = logging.getLogger("matchups.splits")
+
+PEOPLE_URL = "https://statsapi.mlb.com/api/v1/people"
+SPLITS_DIR = os.path.join(os.path.dirname(CACHE_PATH), "splits")
+BATCH = 50
+MAX_WORKERS = 4
+CODES = {"vl": "vL", "vr": "vR"}
+
+
+def _fetch_batch(ids, season):
+    people = get_json(PEOPLE_URL, params={
+        "personIds": ",".join(map(str, ids)),
+        "hydrate": f"stats(group=[hitting],type=[statSplits],sitCodes=[{','.join(CODES)}],season={season})",
+    }).get("people", [])
+    out = {}
+    for p in people:
+        splits = {}
+        for group in p.get("stats", []):
+            for s in group.get("splits", []):
+                code = s.get("split", {}).get("code")
+                if code in CODES:
+                    splits[code] = {"avg": s["stat"].get("avg"), "ops": s["stat"].get("ops")}
+        out[str(p["id"])] = splits
+    return out
+
+
+def fetch_splits(ids, season, max_workers=MAX_WORKERS):
+    """
+    {player id (str): {"vl"/"vr": {"avg", "ops"}}} for every id; hitters
+    without a plate appearance against a hand have no entry for it.
+    """
+    ids = sorted(set(ids))
+    batches = [ids[i:i + BATCH] for i in range(0, len(ids), BATCH)]
+    found = {}
+    for part in gather(*(lambda b=b: _fetch_batch(b, season) for b in batches), max_workers=max_workers):
+        found.update(part)
+    return {str(i): found.get(str(i), {}) for i in ids}
+
+
+def splits_for(date_str, ids, directory=SPLITS_DIR):
+    """The day's cached splits, fetching (and caching) only the ids it lacks."""
+    path = os.path.join(directory, f"{date_str}.json")
+    known = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            known = json.load(f)
+    missing = sorted({i for i in ids if str(i) not in known})
+    if missing:
+        known.update(fetch_splits(missing, int(date_str[:4])))
+        os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(known, f, sort_keys=True)
+        os.replace(tmp, path)
+    log.info(f"Platoon splits for {len(set(ids))} hitters, {len(missing)} fetched")
+    return known
+
+
+def _line(splits):
+    return "  ".join(f"{label} {s['avg']}/{s['ops']}" if (s := splits.get(code)) else f"{label} -"
+                     for code, label in CODES.items())
+
+
+def add_splits(best_df, picks, splits):
+    """
+    best_df with a *_Splits column after each hitter column, one
+    'vL avg/ops  vR avg/ops' line per hitter. Lines follow the picks'
+    order, which is the order annotate_positions() listed them in.
+    """
+    lines = picks["player_id"].map(lambda pid: _line(splits.get(str(pid), {})))
+    cells = (lines.groupby([picks["TEAM"], picks["column"]], sort=False).agg("\n".join)
+             .unstack("column")
+             .reindex(index=best_df["TEAM"], columns=list(BATTER_COLS))
+             .fillna("").astype(str))
+    out = best_df.copy()
+    for col, split_col in zip(BATTER_COLS, SPLIT_COLS):
+        out.insert(out.columns.get_loc(col) + 1, split_col, cells[col].to_numpy())
+    return out
+
+
+def split_stats(picks, splits):
+    """picks with numeric vl_avg, vl_ops, vr_avg and vr_ops columns (NaN where a hitter has no split)."""
+    found = [splits.get(str(pid), {}) for pid in picks["player_id"]]
+    return picks.assign(**{f"{code}_{stat}": pd.to_numeric([s.get(code, {}).get(stat) for s in found],
+                                                           errors="coerce")
+                           for code in CODES for stat in ("avg", "ops")})
+
+
+def enrich(date_str, best_df, picks):
+    """
+    Platoon splits for every hitter build_matchups() picked, joined on MLB
+    id: (best_df with the split columns, picks with the numeric splits).
+    """
+    splits = splits_for(date_str, picks["player_id"].tolist())
+    return add_splits(best_df, picks, splits), split_stats(picks, splits)
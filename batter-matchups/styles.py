@@ -0,0 +1,13 @@
+# Rating colour bands shared by the workbook and the PNG renderer:
+# (low, high, fill, font colour) for LHB/RHB cells
+RATING_BANDS = [
+    (1, 1, "#05AEF0", "white"),
+    (2, 3, "#BCDEEE", "black"),
+    (8, 9, "#EE9880", "black"),
+    (10, 10, "#F50D1F", "white"),
+]
+OFF_FILL = "#A9A9A9"
+BORDER = "#A9A9A9"
+BATTER_COLS = ("LH_Batters", "RH_Batters", "Switch")
+# Optional platoon-split columns, one per BATTER_COLS column (see splits.py)
+SPLIT_COLS = ("LH_Splits", "RH_Splits", "Switch_Splits")
@@ -0,0 +1,130 @@
+"""
+Compact JSON payloads for the browser viewer.
+
+Each day's Matchups and BestMatchups are written as
+pitcher_matchups_<date>.json next to the workbook, with a gzip sibling the
+viewer inflates itself, so a phone loads a few KB instead of two large
+PNGs. matchups.html renders the tables client-side
+with the sheet's colour bands, and matchups_search.json indexes every
+published date by team and hitter.
+"""
+import gzip
+import json
+import math
+import os
+
+from archive import HITTER_RE, SIDES
+from styles import BATTER_COLS, OFF_FILL, RATING_BANDS, SPLIT_COLS
+
+SEARCH_PATH = "matchups_search.json"
+VIEWER_PAGE = "matchups.html"
+
+
+def _value(val):
+    if val is None or (isinstance(val, float) and math.isnan(val)):
+        return None
+    if isinstance(val, float) and val.is_integer():
+        return int(val)
+    return val
+
+
+def _table(frame):
+    out = frame.drop(columns=["GamePk"])
+    return {"columns": list(out.columns),
+            "rows": [[_value(v) for v in row] for row in out.astype(object).itertuples(index=False)]}
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def compressed(data):
+    """{suffix: bytes} for the precompressed siblings of a payload; mtime is pinned so output is reproducible."""
+    return {".gz": gzip.compress(data, 9, mtime=0)}
+
+
+def encode(name, obj):
+    """{filename: bytes}: the compact JSON and its precompressed siblings."""
+    data = _dumps(obj)
+    return {name: data, **{name + suffix: blob for suffix, blob in compressed(data).items()}}
+
+
+def _write(files):
+    for name, data in files.items():
+        with open(name, "wb") as f:
+            f.write(data)
+    return list(files)
+
+
+def day_payload(df, best_df, display_date, date_str):
+    return {"date": date_str, "title": display_date, "matchups": _table(df), "best": _table(best_df)}
+
+
+def write_day(df, best_df, display_date, date_str):
+    """Write pitcher_matchups_<date>.json(.gz); returns the paths."""
+    return _write(encode(f"pitcher_matchups_{date_str}.json", day_payload(df, best_df, display_date, date_str)))
+
+
+def hitters(best_df):
+    """(name, team, side) for every listed hitter, side being L, R or S."""
+    out = []
+    for rec in best_df[["TEAM", *BATTER_COLS]].itertuples(index=False):
+        for col, cell in zip(BATTER_COLS, rec[1:]):
+            for line in filter(None, (cell or "").split("\n")):
+                out.append((HITTER_RE.match(line.strip()).group(1), rec[0], SIDES[col]))
+    return out
+
+
+class SearchIndex:
+    """
+    Cross-date lookup of the BestMatchups sheets, stored inverted for the
+    viewer: {"dates": [...], "teams": {team: [date#]}, "hitters":
+    {name: [[date#, team, side]]}}. Re-adding a date replaces its entries.
+    """
+
+    def __init__(self, path=SEARCH_PATH):
+        self.path = path
+        self.days = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            dates = data.get("dates", [])
+            self.days = {d: {"teams": [], "hitters": []} for d in dates}
+            for team, refs in data.get("teams", {}).items():
+                for i in refs:
+                    self.days[dates[i]]["teams"].append(team)
+            for name, refs in data.get("hitters", {}).items():
+                for i, team, side in refs:
+                    self.days[dates[i]]["hitters"].append((name, team, side))
+
+    def add(self, date_str, best_df):
+        self.days[date_str] = {"teams": best_df["TEAM"].tolist(), "hitters": hitters(best_df)}
+
+    def to_dict(self):
+        dates = sorted(self.days)
+        teams, names = {}, {}
+        for i, day in enumerate(dates):
+            for team in self.days[day]["teams"]:
+                teams.setdefault(team, []).append(i)
+            for name, team, side in self.days[day]["hitters"]:
+                names.setdefault(name, []).append([i, team, side])
+        return {"dates": dates, "teams": dict(sorted(teams.items())), "hitters": dict(sorted(names.items()))}
+
+    def save(self):
+        """Write the index and its compressed siblings; returns them as {filename: bytes} for publishing."""
+        files = encode(os.path.basename(self.path), self.to_dict())
+        directory = os.path.dirname(self.path)
+        for name, data in files.items():
+            tmp = os.path.join(directory, name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, os.path.join(directory, name))
+        return files
+
+
+def render_viewer():
+    """The static viewer page; it only changes when the colour bands do."""
+    from indexer import _template
+    return _template(VIEWER_PAGE).render(
+        bands=[list(b) for b in RATING_BANDS], off_fill=OFF_FILL,
+        text_cols=[*BATTER_COLS, *SPLIT_COLS], search=os.path.basename(SEARCH_PATH))
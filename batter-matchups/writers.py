@@ -0,0 +1,128 @@
+"""
+Output formats for a day's frames, one registered writer per format.
+
+xlsx is the styled workbook. parquet, arrow (IPC file) and csv write the
+same Matchups and BestMatchups tables straight from the DataFrames for the
+lineup optimizer and dashboards. GamePk is a nullable integer, and the
+hitter columns are lists of {name, position, player_id} built from the
+day's picks instead of newline-separated text; the split columns, when
+present, are lists of {player_id, vl_avg, vl_ops, vr_avg, vr_ops} numbers:
+
+    python batter-matchups --formats xlsx,parquet
+    python espn_pitchermatchups_withtimes2.py --formats csv --no-upload
+
+Writers import their libraries (xlsxwriter, pyarrow) when they run, so
+this module is safe to import at startup.
+"""
+import argparse
+import json
+
+from styles import BATTER_COLS, SPLIT_COLS
+
+WRITERS = {}
+DEFAULT_FORMATS = ("xlsx",)
+LIST_COLS = BATTER_COLS + SPLIT_COLS
+HITTER_FIELDS = (("name", "string"), ("position", "string"), ("player_id", "int64"))
+SPLIT_FIELDS = (("player_id", "int64"), ("vl_avg", "float64"), ("vl_ops", "float64"),
+                ("vr_avg", "float64"), ("vr_ops", "float64"))
+
+
+def register(name):
+    """Add a writer: fn(df, best_df, picks, display_date, date_str, constant_memory) -> [paths]."""
+    def wrap(fn):
+        WRITERS[name] = fn
+        return fn
+    return wrap
+
+
+def parse_formats(text):
+    """--formats 'xlsx,csv' -> ['xlsx', 'csv']."""
+    names = [n.strip() for n in text.split(",") if n.strip()]
+    unknown = [n for n in names if n not in WRITERS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown format(s) {', '.join(unknown)}; "
+                                         f"choose from {', '.join(WRITERS)}")
+    return names
+
+
+def write(formats, df, best_df, picks, display_date, date_str, constant_memory=False):
+    """Run the selected writers in registry order; returns every path written."""
+    paths = []
+    for name in (n for n in WRITERS if n in formats):
+        paths += WRITERS[name](df, best_df, picks, display_date, date_str, constant_memory)
+    return paths
+
+
+def _records(picks, fields):
+    """{(TEAM, column): [{field: value}]} with missing values as None."""
+    cols = [f for f, _ in fields]
+    return {key: group[cols].astype(object).where(group[cols].notna(), None).to_dict("records")
+            for key, group in picks.groupby(["TEAM", "column"], sort=False)}
+
+
+def tables(df, best_df, picks):
+    """
+    {sheet: frame} with GamePk as Int64 and the hitter (and split) columns
+    as lists of records from picks, in the order the sheet lists them.
+    """
+    teams = best_df["TEAM"].tolist()
+    hitters = _records(picks, HITTER_FIELDS)
+    lists = {c: [hitters.get((team, c), []) for team in teams] for c in BATTER_COLS}
+    if any(c in best_df for c in SPLIT_COLS):
+        splits = _records(picks, SPLIT_FIELDS)
+        lists.update({s: [splits.get((team, c), []) for team in teams] for c, s in zip(BATTER_COLS, SPLIT_COLS)})
+    return {"Matchups": df.astype({"GamePk": "Int64"}),
+            "BestMatchups": best_df.astype({"GamePk": "Int64"}).assign(**lists)}
+
+
+def _arrow_table(frame):
+    import pyarrow as pa
+    types = {c: pa.list_(pa.struct([(f, pa.type_for_alias(t)) for f, t in HITTER_FIELDS])) for c in BATTER_COLS}
+    types.update({c: pa.list_(pa.struct([(f, pa.type_for_alias(t)) for f, t in SPLIT_FIELDS])) for c in SPLIT_COLS})
+    lists = [c for c in frame.columns if c in LIST_COLS]
+    table = pa.Table.from_pandas(frame.drop(columns=lists), preserve_index=False)
+    for c in lists:
+        table = table.add_column(frame.columns.get_loc(c), c, pa.array(frame[c].tolist(), type=types[c]))
+    return table
+
+
+@register("xlsx")
+def write_xlsx(df, best_df, picks, display_date, date_str, constant_memory=False):
+    from excel_export import write_spreadsheets
+    return [write_spreadsheets(df, best_df, display_date, date_str, constant_memory)]
+
+
+@register("parquet")
+def write_parquet(df, best_df, picks, display_date, date_str, constant_memory=False):
+    import pyarrow.parquet as pq
+    paths = []
+    for sheet, frame in tables(df, best_df, picks).items():
+        path = f"pitcher_matchups_{date_str}_{sheet}.parquet"
+        pq.write_table(_arrow_table(frame), path, compression="zstd")
+        paths.append(path)
+    return paths
+
+
+@register("arrow")
+def write_arrow(df, best_df, picks, display_date, date_str, constant_memory=False):
+    import pyarrow as pa
+    paths = []
+    for sheet, frame in tables(df, best_df, picks).items():
+        path = f"pitcher_matchups_{date_str}_{sheet}.arrow"
+        table = _arrow_table(frame)
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        paths.append(path)
+    return paths
+
+
+@register("csv")
+def write_csv(df, best_df, picks, display_date, date_str, constant_memory=False):
+    """CSV has no list type, so list columns are written as JSON arrays."""
+    paths = []
+    for sheet, frame in tables(df, best_df, picks).items():
+        path = f"pitcher_matchups_{date_str}_{sheet}.csv"
+        lists = {c: [json.dumps(v, ensure_ascii=False) for v in frame[c]] for c in LIST_COLS if c in frame}
+        frame.assign(**lists).to_csv(path, index=False)
+        paths.append(path)
+    return paths
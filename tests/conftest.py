@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules are flat files in batter-matchups/, imported the way the CLIs import them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "batter-matchups"))
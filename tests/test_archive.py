@@ -0,0 +1,34 @@
+"""Archive ingest: workbook digests and hitters sharing a name."""
+import os
+import shutil
+
+import pandas as pd
+
+from archive import Archive
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_regenerated_workbook_is_reingested(tmp_path):
+    path = tmp_path / "pitcher_matchups_2025-09-26.xlsx"
+    shutil.copy(os.path.join(ROOT, "pitcher_matchups_2025-09-26.xlsx"), path)
+    archive = Archive(str(tmp_path / "a.sqlite"))
+    assert archive.ingest_workbook(str(path))
+    assert not archive.ingest_workbook(str(path))
+    shutil.copy(os.path.join(ROOT, "pitcher_matchups_2025-09-25.xlsx"), path)
+    assert archive.ingest_workbook(str(path))
+    archive.close()
+
+
+def test_same_name_on_one_team(tmp_path):
+    df = pd.DataFrame({"TEAM": ["LAD"], "OPP": ["SD"], "StartTime": ["7:10 PM"], "GamePk": [776001],
+                       "LHB": [9], "RHB": [6]})
+    best_df = df.drop(columns=["StartTime"]).assign(
+        LH_Batters=["Will Smith (C)\nWill Smith (P)"], RH_Batters=[""], Switch=[""])
+    picks = pd.DataFrame({"TEAM": ["LAD", "LAD"], "column": ["LH_Batters", "LH_Batters"],
+                          "player_id": [669257, 519293], "name": ["Will Smith", "Will Smith"],
+                          "position": ["C", "P"]})
+    archive = Archive(str(tmp_path / "a.sqlite"))
+    archive.ingest_frames("2025-09-26", df, best_df, picks)
+    assert sorted(archive.hitters(name="Will Smith")["player_id"]) == [519293, 669257]
+    archive.close()
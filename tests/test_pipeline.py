@@ -0,0 +1,25 @@
+"""Stage wiring: only the files a run wrote are published."""
+import datetime
+
+import pandas as pd
+
+import gdrive
+from gdrive import LocalDriveBackend
+from pipeline import Context, run_stages
+
+
+def test_publish_sends_only_written_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stale = tmp_path / "pitcher_matchups_2025-09-26.xlsx"
+    stale.write_bytes(b"from an earlier run")
+    drive = tmp_path / "drive"
+    monkeypatch.setattr(gdrive, "upload_to_gdrive",
+                        lambda paths: gdrive.sync(paths, LocalDriveBackend(str(drive))))
+    ctx = Context(datetime.date(2025, 9, 26), publish_to="gdrive", formats=["csv"])
+    ctx.df = pd.DataFrame({"TEAM": ["LAD"], "OPP": ["SD"], "LHB": [9], "RHB": [6], "GamePk": [776001]})
+    ctx.best_df = ctx.df.assign(LH_Batters=["Max Muncy (3B)"], RH_Batters=[""], Switch=[""])
+    ctx.picks = pd.DataFrame({"TEAM": ["LAD"], "column": ["LH_Batters"], "player_id": [571970],
+                              "name": ["Max Muncy"], "position": ["3B"]})
+    assert run_stages(ctx, ["export", "publish"], provided=("df", "best_df", "picks"))
+    assert ctx.written == ["pitcher_matchups_2025-09-26_Matchups.csv", "pitcher_matchups_2025-09-26_BestMatchups.csv"]
+    assert sorted(p.name for p in drive.iterdir()) == sorted(ctx.written)
@@ -0,0 +1,17 @@
+"""The check_startup.py budget, enforced under pytest."""
+import pytest
+
+from check_startup import BUDGET, COMMANDS, HEAVY, imported, median_wall
+
+REPEAT = 5
+
+
+@pytest.mark.parametrize("name", COMMANDS)
+def test_help_imports_nothing_heavy(name):
+    assert not set(HEAVY) & imported(COMMANDS[name])
+
+
+@pytest.mark.parametrize("name", COMMANDS)
+def test_help_within_budget(name):
+    over = median_wall(COMMANDS[name], REPEAT) - median_wall(["-c", "pass"], REPEAT)
+    assert over <= BUDGET, f"{name} --help takes {over * 1000:.0f} ms over bare Python"
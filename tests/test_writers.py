@@ -0,0 +1,82 @@
+"""The columnar writers, on a small slate with a shared hitter name and an unscheduled team."""
+import json
+
+import pandas as pd
+import pytest
+
+from writers import tables, write
+
+DATE = "2025-09-26"
+
+
+@pytest.fixture
+def frames():
+    df = pd.DataFrame({"StartTime": ["7:05 PM", "7:05 PM", ""], "TEAM": ["LAD", "ATH", "COL"],
+                       "OPP": ["ATH", "@LAD", "OFF"], "LHB": [9, 8, None], "RHB": [6, 9, None],
+                       "GamePk": [776001.0, 776001.0, float("nan")]})
+    best_df = df.iloc[:2].drop(columns=["StartTime"]).assign(
+        LH_Batters=["Max Muncy (3B)", "Max Muncy (2B)"], RH_Batters=["", "Brent Rooker (DH)"], Switch=["", ""])
+    picks = pd.DataFrame({"TEAM": ["LAD", "ATH", "ATH"], "column": ["LH_Batters", "LH_Batters", "RH_Batters"],
+                          "player_id": [571970, 691777, 667670], "name": ["Max Muncy", "Max Muncy", "Brent Rooker"],
+                          "position": ["3B", "2B", "DH"]})
+    return df, best_df, picks
+
+
+@pytest.fixture
+def split_frames(frames):
+    """frames after the splits stage: *_Splits columns beside the hitter ones and numeric splits on the picks."""
+    df, best_df, picks = frames
+    for col, split_col in (("LH_Batters", "LH_Splits"), ("RH_Batters", "RH_Splits"), ("Switch", "Switch_Splits")):
+        best_df.insert(best_df.columns.get_loc(col) + 1, split_col, "")
+    picks = picks.assign(vl_avg=[0.25, None, 0.3], vl_ops=[0.8, None, 0.9], vr_avg=[0.27, 0.2, 0.31],
+                         vr_ops=[0.85, 0.6, 0.95])
+    return df, best_df, picks
+
+
+def test_tables(frames):
+    sheets = tables(*frames)
+    assert sheets["Matchups"]["GamePk"].dtype == "Int64"
+    assert sheets["Matchups"]["GamePk"].isna().tolist() == [False, False, True]
+    best = sheets["BestMatchups"]
+    assert best["LH_Batters"].tolist() == [[{"name": "Max Muncy", "position": "3B", "player_id": 571970}],
+                                           [{"name": "Max Muncy", "position": "2B", "player_id": 691777}]]
+    assert best["RH_Batters"].tolist() == [[], [{"name": "Brent Rooker", "position": "DH", "player_id": 667670}]]
+
+
+def test_split_columns(split_frames):
+    best = tables(*split_frames)["BestMatchups"]
+    assert best["LH_Splits"].tolist()[1] == [
+        {"player_id": 691777, "vl_avg": None, "vl_ops": None, "vr_avg": 0.2, "vr_ops": 0.6}]
+    assert best["Switch_Splits"].tolist() == [[], []]
+
+
+def test_csv(frames, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paths = write(["csv"], *frames, "September 26, 2025", DATE)
+    assert paths == [f"pitcher_matchups_{DATE}_Matchups.csv", f"pitcher_matchups_{DATE}_BestMatchups.csv"]
+    matchups = pd.read_csv(paths[0], dtype={"GamePk": "Int64"})
+    assert matchups["GamePk"].tolist()[:2] == [776001, 776001]
+    assert open(paths[0]).read().splitlines()[1].endswith(",776001")
+    best = pd.read_csv(paths[1])
+    assert [h["player_id"] for h in json.loads(best["LH_Batters"][0]) + json.loads(best["LH_Batters"][1])] == [
+        571970, 691777]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar(fmt, split_frames, tmp_path, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    monkeypatch.chdir(tmp_path)
+    paths = write([fmt], *split_frames, "September 26, 2025", DATE)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        matchups, best = (pq.read_table(p) for p in paths)
+    else:
+        matchups, best = (pa.ipc.open_file(pa.memory_map(p)).read_all() for p in paths)
+    assert matchups.schema.field("GamePk").type == pa.int64()
+    assert matchups.column("GamePk").to_pylist() == [776001, 776001, None]
+    assert best.schema.field("LH_Batters").type == pa.list_(pa.struct(
+        [("name", pa.string()), ("position", pa.string()), ("player_id", pa.int64())]))
+    assert best.column_names == list(split_frames[1].columns)
+    assert best.column("LH_Batters").to_pylist()[1] == [{"name": "Max Muncy", "position": "2B", "player_id": 691777}]
+    assert best.column("LH_Splits").to_pylist()[0] == [
+        {"player_id": 571970, "vl_avg": 0.25, "vl_ops": 0.8, "vr_avg": 0.27, "vr_ops": 0.85}]